@@ -1,19 +1,37 @@
 # Projeto PIM - 1º Semestre de ADS - UNIP
 # Sistema de cadastro e análise de usuários com segurança e estatísticas
 
+import argparse
+import atexit
+import bisect
+import csv
 import json
 import os
+import random
+import re
+import functools
+import uuid
+import zlib
+import sqlite3
 import secrets
 import time
+import threading
 import base64
 import hashlib
+import hmac
 import binascii
-import matplotlib.pyplot as plt
+import sys
+import importlib
+import tempfile
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
 import getpass
-from statistics import mean, median, mode
-from cryptography.fernet import Fernet, InvalidToken
-from collections import Counter
-from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem travas entre processos
+    fcntl = None
 
 # Diretório base fixo na pasta do script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,333 +39,2364 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Arquivos
 DATA_FILE = os.path.join(BASE_DIR, 'dados.json')
 KEY_FILE = os.path.join(BASE_DIR, 'chave.key')
-BACKUP_FILE = os.path.join(BASE_DIR, 'backup.json')
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 USERS_FILE = os.path.join(BASE_DIR, 'usuarios.json')
-def gerar_chave():
-    chave = Fernet.generate_key()
-    with open(KEY_FILE, 'wb') as keyfile:
-        keyfile.write(chave)
-    return chave
+INDEX_KEY_FILE = os.path.join(BASE_DIR, 'indice.key')
+LOG_FILE = os.path.join(BASE_DIR, 'dados.log')
+SQLITE_FILE = os.path.join(BASE_DIR, 'pim.db')
+DESEMPENHO_FILE = os.path.join(BASE_DIR, 'desempenho.json')
+DESEMPENHO_LOG_FILE = os.path.join(BASE_DIR, 'desempenho.jsonl')
+AGREGADO_FILE = os.path.join(BASE_DIR, 'desempenho_agregado.json')
+PERGUNTAS_FILE = os.environ.get('PIM_PERGUNTAS') or os.path.join(BASE_DIR, 'perguntas.json')
+
+# Hash de senha: scrypt (ou PBKDF2 se o Python não tiver scrypt) com sal por
+# usuário. O custo é calibrado uma vez por máquina para a verificação levar cerca
+# de ALVO_HASH_MS e fica salvo em HASH_PARAMS_FILE.
+HASH_PARAMS_FILE = os.path.join(BASE_DIR, 'custo_senha.json')
+MIGRACOES_FILE = os.path.join(BASE_DIR, 'migracoes.json')
+ALVO_HASH_MS = float(os.environ.get('PIM_HASH_ALVO_MS', 100))
+
+# Backups incrementais: média de registros por bloco, tamanho dos blocos de
+# arquivos binários e quantos backups manter (os últimos N e um por dia)
+MEDIA_REGISTROS_BLOCO = 32
+TAMANHO_BLOCO_BINARIO = 64 * 1024
+RETER_ULTIMOS_BACKUPS = 7
+RETER_DIAS_BACKUPS = 30
+
+# Gráficos: 'janela' abre cada gráfico na tela; 'arquivo' grava em GRAFICOS_DIR.
+# Sem PIM_GRAFICOS definido, usa 'arquivo' quando não há tela (Linux sem DISPLAY).
+GRAFICOS_DIR = os.path.join(BASE_DIR, 'graficos')
+FORMATO_GRAFICOS = os.environ.get('PIM_GRAFICOS_FORMATO', 'png')
+SEM_TELA = sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+MODO_GRAFICOS = os.environ.get('PIM_GRAFICOS') or ('arquivo' if SEM_TELA else 'janela')
+
+# Bibliotecas pesadas (matplotlib, numpy, cryptography) só são importadas no
+# primeiro uso, para o menu de login aparecer sem esperar por elas.
+class ModuloPreguicoso:
+    def __init__(self, nome, preparar=None):
+        self._nome = nome
+        self._preparar = preparar
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            if self._preparar:
+                self._preparar()
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+def configurar_matplotlib():
+    if MODO_GRAFICOS == 'arquivo':
+        importlib.import_module('matplotlib').use('Agg')
+
+plt = ModuloPreguicoso('matplotlib.pyplot', configurar_matplotlib)
+np = ModuloPreguicoso('numpy')
+fernet = ModuloPreguicoso('cryptography.fernet')
+
+# Instrumentação opcional (PIM_INSTRUMENTAR=1, --instrumentar ou --profile).
+# @instrumentado só anota a função; nada muda até ativar_instrumentacao() trocar
+# as funções anotadas por versões cronometradas, então desligada não custa nada.
+# Cada operação guarda um histograma de duração e os contadores (registros
+# lidos, descriptografados, bytes gravados) somados durante as suas chamadas.
+TELEMETRIA_DIR = os.path.join(BASE_DIR, 'telemetry')
+LIMITES_HISTOGRAMA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+INSTRUMENTADOS = []
+_metricas = None
+_trava_metricas = threading.Lock()
+_pilha_medicoes = threading.local()
+_sessao = None
+
+def instrumentado(funcao):
+    INSTRUMENTADOS.append(funcao.__qualname__)
+    return funcao
+
+class Medicao:
+    __slots__ = ('nome', 'inicio', 'contadores')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.contadores = {}
+
+    def __enter__(self):
+        pilha = getattr(_pilha_medicoes, 'pilha', None)
+        if pilha is None:
+            pilha = _pilha_medicoes.pilha = []
+        pilha.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        duracao = time.perf_counter() - self.inicio
+        _pilha_medicoes.pilha.pop()
+        with _trava_metricas:
+            operacao = _metricas['operacoes'].setdefault(self.nome, {
+                'chamadas': 0, 'soma': 0.0, 'maximo': 0.0,
+                'baldes': [0] * (len(LIMITES_HISTOGRAMA) + 1), 'contadores': {}})
+            operacao['chamadas'] += 1
+            operacao['soma'] += duracao
+            operacao['maximo'] = max(operacao['maximo'], duracao)
+            operacao['baldes'][bisect.bisect_left(LIMITES_HISTOGRAMA, duracao)] += 1
+            for contador, quantidade in self.contadores.items():
+                operacao['contadores'][contador] = operacao['contadores'].get(contador, 0) + quantidade
+        return False
+
+_SEM_MEDICAO = nullcontext()
+
+def medir(nome):
+    # Cronometra um trecho: with medir('json.dump'): ...
+    return Medicao(nome) if _metricas is not None else _SEM_MEDICAO
+
+# Serialização das bases JSON, medida à parte da escrita em disco (gravar_atomico)
+def serializar(dados):
+    with medir('json.dump'):
+        return json.dumps(dados).encode()
+
+def desserializar(conteudo):
+    with medir('json.load'):
+        return json.loads(conteudo)
+
+def contar(contador, quantidade=1):
+    if _metricas is None:
+        return
+    for medicao in getattr(_pilha_medicoes, 'pilha', ()):
+        medicao.contadores[contador] = medicao.contadores.get(contador, 0) + quantidade
+    with _trava_metricas:
+        _metricas['contadores'][contador] = _metricas['contadores'].get(contador, 0) + quantidade
+
+def cronometrado(funcao, nome):
+    @functools.wraps(funcao)
+    def medir_chamada(*args, **kwargs):
+        with Medicao(nome):
+            return funcao(*args, **kwargs)
+    # Nome próprio por função: senão o cProfile junta todos os invólucros num só
+    medir_chamada.__code__ = medir_chamada.__code__.replace(co_name=f"medir:{nome}")
+    return medir_chamada
+
+def ativar_instrumentacao(arquivo_metricas=None):
+    global _metricas, _sessao
+    if _metricas is not None:
+        return
+    _metricas = {'operacoes': {}, 'contadores': {}}
+    _sessao = {'session_id': str(uuid.uuid4()), 'start_time': agora_utc(), 'inicio': time.time(),
+               'arquivo_metricas': arquivo_metricas}
+    modulo = sys.modules[__name__]
+    for nome in INSTRUMENTADOS:
+        dono, _, atributo = nome.rpartition('.')
+        alvo = getattr(modulo, dono) if dono else modulo
+        setattr(alvo, atributo, cronometrado(getattr(alvo, atributo), nome))
+    atexit.register(encerrar_instrumentacao)
+
+def agora_utc():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+def exportar_metricas(caminho):
+    # .prom/.txt: formato texto do Prometheus; qualquer outra extensão: JSON
+    with _trava_metricas:
+        metricas = json.loads(json.dumps(_metricas))
+    if caminho.endswith(('.prom', '.txt')):
+        linhas = ["# HELP pim_duracao_segundos Duração das operações instrumentadas do PIM",
+                  "# TYPE pim_duracao_segundos histogram"]
+        for nome, operacao in sorted(metricas['operacoes'].items()):
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES_HISTOGRAMA + ('+Inf',), operacao['baldes']):
+                acumulado += quantidade
+                linhas.append(f'pim_duracao_segundos_bucket{{operacao="{nome}",le="{limite}"}} {acumulado}')
+            linhas.append(f'pim_duracao_segundos_sum{{operacao="{nome}"}} {operacao["soma"]}')
+            linhas.append(f'pim_duracao_segundos_count{{operacao="{nome}"}} {operacao["chamadas"]}')
+        linhas += ["# HELP pim_registros_total Contadores somados por operação",
+                   "# TYPE pim_registros_total counter"]
+        for nome, operacao in sorted(metricas['operacoes'].items()):
+            for contador, quantidade in sorted(operacao['contadores'].items()):
+                linhas.append(f'pim_registros_total{{operacao="{nome}",contador="{contador}"}} {quantidade}')
+        conteudo = '\n'.join(linhas) + '\n'
+    else:
+        metricas['limites_histograma'] = list(LIMITES_HISTOGRAMA)
+        conteudo = json.dumps(metricas, indent=4, ensure_ascii=False)
+    with open(caminho, 'w', encoding='utf-8') as file:
+        file.write(conteudo)
+
+def gravar_telemetria():
+    # Mesmo formato das sessões já salvas em telemetry/, mais 'metricas' e 'perfil'
+    import platform
+    import shutil
+    import socket
+    hostname = socket.gethostname()
+    try:
+        ip_address = socket.gethostbyname(hostname)
+    except OSError:
+        ip_address = None
+    tamanho = shutil.get_terminal_size()
+    with _trava_metricas:
+        metricas = json.loads(json.dumps(_metricas))
+    sessao = {
+        'session_id': _sessao['session_id'],
+        'start_time': _sessao['start_time'],
+        'user': {'username': getpass.getuser(), 'hostname': hostname, 'ip_address': ip_address},
+        'environment': {'os': platform.platform(), 'python_version': platform.python_version(),
+                        'cwd': os.getcwd(), 'terminal_size': {'columns': tamanho.columns, 'rows': tamanho.lines}},
+        'args': sys.argv[1:],
+        'env_vars': {nome: os.environ.get(nome) for nome in ('LANG', 'TERM')},
+        'clicked_links': [],
+        'end_time': agora_utc(),
+        'duration_seconds': time.time() - _sessao['inicio'],
+        'metricas': metricas,
+    }
+    if _sessao.get('perfil'):
+        sessao['perfil'] = _sessao['perfil']
+    os.makedirs(TELEMETRIA_DIR, exist_ok=True)
+    caminho = os.path.join(TELEMETRIA_DIR, f"telemetry_{sessao['session_id']}.json")
+    with open(caminho, 'w', encoding='utf-8') as file:
+        json.dump(sessao, file, indent=4, ensure_ascii=False)
+    return caminho
+
+def encerrar_instrumentacao():
+    if _sessao.get('arquivo_metricas'):
+        exportar_metricas(_sessao['arquivo_metricas'])
+    gravar_telemetria()
+
+def rotulo_funcao(funcao):
+    arquivo, linha, nome = funcao
+    rotulo = nome if arquivo == '~' else f"{nome} ({os.path.basename(arquivo)}:{linha})"
+    return rotulo.replace(';', ',')
+
+def gravar_pilhas(estatisticas, caminho):
+    # O cProfile só guarda pares chamador -> chamado; as pilhas são reconstruídas
+    # repartindo o tempo de cada função entre os chamadores na proporção de cada
+    # aresta. Saída em "pilhas dobradas" (flamegraph.pl, speedscope, inferno).
+    chamados = {}
+    for funcao, (_, _, _, _, chamadores) in estatisticas.items():
+        for chamador, aresta in chamadores.items():
+            chamados.setdefault(chamador, {})[funcao] = aresta[3]
+    pilhas = {}
+
+    def descer(funcao, pilha, fator):
+        tempo_proprio, tempo_total = estatisticas[funcao][2], estatisticas[funcao][3]
+        if fator * tempo_total < 1e-6 or len(pilha) > 200:
+            return
+        chave = ';'.join(rotulo_funcao(f) for f in pilha)
+        pilhas[chave] = pilhas.get(chave, 0) + tempo_proprio * fator
+        for filho, tempo_aresta in chamados.get(funcao, {}).items():
+            if filho not in pilha and estatisticas[filho][3] > 0:
+                descer(filho, pilha + [filho], fator * tempo_aresta / estatisticas[filho][3])
+
+    for funcao, (_, _, _, _, chamadores) in estatisticas.items():
+        if not any(chamador in estatisticas for chamador in chamadores):
+            descer(funcao, [funcao], 1.0)
+    with open(caminho, 'w', encoding='utf-8') as file:
+        for chave, segundos in sorted(pilhas.items()):
+            if round(segundos * 1e6):
+                file.write(f"{chave} {round(segundos * 1e6)}\n")
+
+def executar_com_perfil(funcao, caminho=None):
+    # Roda a sessão sob cProfile; grava as pilhas dobradas (tempo em µs) em
+    # 'caminho' e as estatísticas brutas do pstats em 'caminho'.pstats
+    import cProfile
+    import pstats
+    ativar_instrumentacao()
+    caminho = caminho or os.path.join(TELEMETRIA_DIR, f"perfil_{_sessao['session_id']}.folded")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcao)
+    finally:
+        perfil.create_stats()
+        perfil.dump_stats(caminho + '.pstats')
+        gravar_pilhas(perfil.stats, caminho)
+        _sessao['perfil'] = {'pilhas': caminho, 'pstats': caminho + '.pstats'}
+        print(f"\nPerfil gravado em {caminho}")
+        pstats.Stats(perfil).sort_stats('cumulative').print_stats(15)
+
+# Resultados de quiz ficam em memória e vão para o disco em lote: quando o lote
+# atinge TAMANHO_FLUSH_DESEMPENHO registros ou INTERVALO_FLUSH_DESEMPENHO segundos
+TAMANHO_FLUSH_DESEMPENHO = int(os.environ.get('PIM_FLUSH_TAMANHO', 20))
+INTERVALO_FLUSH_DESEMPENHO = float(os.environ.get('PIM_FLUSH_INTERVALO', 5))
+
+# Tamanho (em bytes) a partir do qual o log é compactado de volta no dados.json
+LIMITE_LOG = 256 * 1024
 
-def carregar_chave():
+def gerar_chave():
+    # Sob trava e atômico: duas sessões abertas juntas numa pasta nova ficam com a mesma chave
+    with travar_arquivo(KEY_FILE):
+        if not os.path.exists(KEY_FILE):
+            gravar_atomico(KEY_FILE, fernet.Fernet.generate_key())
+    return carregar_chave()
+
+def carregar_chaves():
+    # chave.key guarda uma chave por linha, da mais nova para a mais antiga
     if not os.path.exists(KEY_FILE):
-        return gerar_chave()
+        gerar_chave()
     with open(KEY_FILE, 'rb') as keyfile:
-        return keyfile.read()
+        return [linha.strip() for linha in keyfile.read().splitlines() if linha.strip()]
 
+def carregar_chave():
+    return carregar_chaves()[0]
+
+# Cifra única por processo: a chave é lida do disco e guardada junto com a
+# identificação do chave.key (inode, mtime, tamanho). Quando outro processo
+# rotaciona a chave, o arquivo muda e a cifra é recarregada na próxima chamada.
+# O MultiFernet criptografa com a chave mais nova e aceita qualquer uma das antigas.
+_cifra = None  # (identificação do chave.key, MultiFernet)
+_trava_cifra = threading.Lock()
+CAMPOS_CRIPTOGRAFADOS = ('nome', 'senha')
+
+def identificar_chaves():
+    estado = os.stat(KEY_FILE)
+    return estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+def obter_cifra():
+    global _cifra
+    with _trava_cifra:
+        if not os.path.exists(KEY_FILE):
+            gerar_chave()
+        identificacao = identificar_chaves()
+        if _cifra is None or _cifra[0] != identificacao:
+            _cifra = (identificacao, fernet.MultiFernet([fernet.Fernet(chave) for chave in carregar_chaves()]))
+        return _cifra[1]
+
+def rotacionar_chave(recriptografar=True):
+    global _cifra
+    if not os.path.exists(KEY_FILE):
+        gerar_chave()  # fora da trava: gerar_chave trava o mesmo arquivo
+    with _trava_cifra, travar_arquivo(KEY_FILE):
+        chaves = [fernet.Fernet.generate_key()] + carregar_chaves()
+        gravar_atomico(KEY_FILE, b'\n'.join(chaves))
+        _cifra = None
+    if recriptografar:
+        return iniciar_recriptografia()
+
+@instrumentado
 def criptografar(dado):
-    chave = carregar_chave()
-    fernet = Fernet(chave)
-    return fernet.encrypt(dado.encode()).decode('utf-8')
+    return obter_cifra().encrypt(dado.encode()).decode('utf-8')
+
+@instrumentado
+def criptografar_varios(dados):
+    cifra = obter_cifra()
+    return [cifra.encrypt(dado.encode()).decode('utf-8') for dado in dados]
 
 def corrigir_padding(base64_string):
     return base64_string + '=' * (-len(base64_string) % 4)
 
-def descriptografar(dado):
-    chave = carregar_chave()
-    fernet = Fernet(chave)
+@instrumentado
+def descriptografar(dado, cifra=None):
+    cifra = cifra or obter_cifra()
+    contar('campos_descriptografados')
     try:
         dado = corrigir_padding(dado)
-        return fernet.decrypt(dado.encode()).decode('utf-8')
-    except (binascii.Error, InvalidToken):
+        return cifra.decrypt(dado.encode()).decode('utf-8')
+    except fernet.InvalidToken:
+        # Pode ser de uma chave criada depois que esta cifra foi carregada
+        atual = obter_cifra()
+        if atual is not cifra:
+            return descriptografar(dado, atual)
+        return "Dado protegido pela LGPD"
+    except binascii.Error:
         return "Dado protegido pela LGPD"
-def carregar_dados():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r') as file:
-            return json.load(file)
-    else:
-        with open(DATA_FILE, 'w') as file:
-            json.dump([], file)
-        return []
 
-def carregar_desempenho():
+@instrumentado
+def descriptografar_varios(dados):
+    cifra = obter_cifra()
+    return [descriptografar(dado, cifra) for dado in dados]
+
+@instrumentado
+def recriptografar_dados(tamanho_lote=500):
+    # Passa os registros para a chave mais nova, um lote por vez. Cada lote relê
+    # a base para não sobrescrever alterações feitas enquanto o job roda.
+    cifra = obter_cifra()
+    inicio = 0
+
+    def recriptografar_lote(lote):
+        for d in lote:
+            for campo in CAMPOS_CRIPTOGRAFADOS:
+                if campo in d:
+                    try:
+                        token = corrigir_padding(d[campo]).encode()
+                        d[campo] = cifra.rotate(token).decode('utf-8')
+                    except (binascii.Error, fernet.InvalidToken):
+                        pass
+        return lote
+
+    while True:
+        processados = armazenamento().atualizar_lote(inicio, tamanho_lote, recriptografar_lote)
+        if not processados:
+            return inicio
+        inicio += processados
+
+def iniciar_recriptografia(tamanho_lote=500):
+    job = threading.Thread(target=recriptografar_dados, args=(tamanho_lote,), daemon=True)
+    job.start()
+    return job
+
+# Índice cego: HMAC determinístico do nome de usuário, guardado ao lado do nome
+# criptografado. Permite localizar um registro sem descriptografar todos eles.
+_chave_indice = None
+
+def carregar_chave_indice():
+    global _chave_indice
+    if _chave_indice is None:
+        if not os.path.exists(INDEX_KEY_FILE):
+            # Como em gerar_chave: uma chave por pasta, mesmo com sessões abrindo juntas
+            with travar_arquivo(INDEX_KEY_FILE):
+                if not os.path.exists(INDEX_KEY_FILE):
+                    gravar_atomico(INDEX_KEY_FILE, secrets.token_bytes(32))
+        with open(INDEX_KEY_FILE, 'rb') as keyfile:
+            _chave_indice = keyfile.read()
+    return _chave_indice
+
+def indice_cego(usuario):
+    return hmac.new(carregar_chave_indice(), usuario.encode(), hashlib.sha256).hexdigest()
+
+def mapear_indices(dados):
+    return {d['indice']: i for i, d in enumerate(dados) if 'indice' in d}
+
+def migrar_indices():
+    # Migração única: adiciona o índice cego aos registros antigos do dados.json.
+    # Registro que não descriptografa fica sem índice (e é informado): indexar o
+    # texto de erro daria o mesmo índice a todos eles.
+    cifra = obter_cifra()
+
+    def ler_nome(registro):
+        try:
+            return cifra.decrypt(corrigir_padding(registro['nome']).encode()).decode('utf-8')
+        except (KeyError, TypeError, binascii.Error, fernet.InvalidToken):
+            return None
+
+    pendentes = [d for d in carregar_dados() if 'indice' not in d]
+    if all(ler_nome(d) is None for d in pendentes):
+        if pendentes:
+            print(f"{len(pendentes)} registro(s) antigo(s) sem índice não puderam ser descriptografados.")
+        return 0
+    migrados = falhas = 0
+
+    def indexar(dados):
+        nonlocal migrados, falhas
+        migrados = falhas = 0
+        for d in dados:
+            if 'indice' in d:
+                continue
+            nome = ler_nome(d)
+            if nome is None:
+                falhas += 1
+                continue
+            d['indice'] = indice_cego(nome)
+            migrados += 1
+        return dados
+
+    atualizar_dados(indexar)
+    if falhas:
+        print(f"{falhas} registro(s) antigo(s) sem índice não puderam ser descriptografados.")
+    return migrados
+
+def remover_senhas_reversiveis():
+    # Registros antigos guardavam a senha criptografada (reversível) no dados.json;
+    # a senha fica só como hash no usuarios.json
+    if all('senha' not in d for d in carregar_dados()):
+        return 0
+    removidas = 0
+
+    def remover(dados):
+        nonlocal removidas
+        for d in dados:
+            removidas += d.pop('senha', None) is not None
+        return dados
+
+    atualizar_dados(remover)
+    return removidas
+
+# Migrações dos dados antigos: cada uma roda uma vez por pasta e armazenamento.
+# As concluídas ficam em MIGRACOES_FILE, então as próximas inicializações não
+# carregam os dados só para descobrir que não há nada a migrar.
+MIGRACOES = (migrar_indices, remover_senhas_reversiveis)
+
+def ler_migracoes():
+    if not os.path.exists(MIGRACOES_FILE):
+        return {}
+    with open(MIGRACOES_FILE, 'r') as file:
+        return json.load(file)
+
+def executar_migracoes():
+    nome = os.environ.get('PIM_ARMAZENAMENTO', 'json')
+    if len(ler_migracoes().get(nome, ())) == len(MIGRACOES):
+        return
+    with travar_arquivo(MIGRACOES_FILE):
+        feitas = ler_migracoes()  # outra sessão pode ter migrado enquanto esta esperava
+        for migracao in MIGRACOES:
+            if migracao.__name__ not in feitas.get(nome, ()):
+                migracao()
+                feitas.setdefault(nome, []).append(migracao.__name__)
+                gravar_atomico(MIGRACOES_FILE, json.dumps(feitas).encode())
+
+# Armazenamento do dados.json: o arquivo é um snapshot e cada alteração vira
+# uma linha no dados.log. A primeira linha do log guarda o hash do snapshot
+# sobre o qual ele foi escrito; se o snapshot mudou (compactação concluída),
+# o log é considerado já aplicado e é ignorado.
+# Travas entre processos (fcntl.flock) num arquivo .lock ao lado de cada base:
+# leituras usam trava compartilhada e alterações usam trava exclusiva, então
+# várias sessões podem rodar ao mesmo tempo sobre a mesma pasta.
+@contextmanager
+def travar_arquivo(caminho, exclusiva=True):
+    if fcntl is None:
+        yield
+        return
+    with open(caminho + '.lock', 'a') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+@instrumentado
+def gravar_atomico(caminho, conteudo):
+    contar('bytes_gravados', len(conteudo))
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    with os.fdopen(descritor, 'wb') as file:
+        file.write(conteudo)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporario, caminho)
+    if hasattr(os, 'O_DIRECTORY'):
+        pasta = os.open(os.path.dirname(caminho), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(pasta)
+        finally:
+            os.close(pasta)
+
+def ler_snapshot():
+    if not os.path.exists(DATA_FILE):
+        gravar_atomico(DATA_FILE, b'[]')
+    with open(DATA_FILE, 'rb') as file:
+        return file.read()
+
+def hash_snapshot(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+def ler_log(base):
+    if not os.path.exists(LOG_FILE):
+        return []
+    mutacoes = []
+    with open(LOG_FILE, 'r') as log:
+        for linha in log:
+            try:
+                mutacao = json.loads(linha)
+            except json.JSONDecodeError:
+                continue  # linha cortada por uma queda no meio da escrita
+            # Um lote ocupa uma linha só: ou ele entra inteiro ou não entra
+            if mutacao.get('op') == 'lote':
+                mutacoes.extend(mutacao['mutacoes'])
+            else:
+                mutacoes.append(mutacao)
+    if not mutacoes or mutacoes[0].get('op') != 'base' or mutacoes[0].get('snapshot') != base:
+        # Sobra de uma compactação interrompida: o snapshot já contém o log
+        try:
+            os.remove(LOG_FILE)
+        except FileNotFoundError:
+            pass
+        return []
+    return mutacoes[1:]
+
+def aplicar_mutacoes(dados, mutacoes):
+    mapa = mapear_indices(dados)
+    for m in mutacoes:
+        op = m['op']
+        if op == 'inserir':
+            indice = m['registro'].get('indice')
+            if indice is not None and indice in mapa:
+                continue
+            mapa[indice] = len(dados)
+            dados.append(m['registro'])
+        elif op == 'excluir':
+            if m['indice'] in mapa:
+                dados = [d for d in dados if d.get('indice') != m['indice']]
+                mapa = mapear_indices(dados)
+        else:
+            posicao = mapa.get(m['indice'])
+            if posicao is None:
+                continue
+            if op == 'incrementar':
+                dados[posicao][m['campo']] = dados[posicao].get(m['campo'], 0) + m['valor']
+            elif op == 'definir':
+                dados[posicao][m['campo']] = m['valor']
+    return dados
+
+@instrumentado
+def registrar_mutacao(mutacao):
+    linhas = []
+    if not os.path.exists(LOG_FILE):
+        linhas.append({'op': 'base', 'snapshot': hash_snapshot(ler_snapshot())})
+    linhas.append(mutacao)
+    with open(LOG_FILE, 'a+b') as log:
+        # Linha cortada por uma queda: começa numa linha nova para não emendar nela
+        inicio = b''
+        if log.tell():
+            log.seek(-1, os.SEEK_END)
+            if log.read(1) != b'\n':
+                inicio = b'\n'
+        log.write(inicio + ''.join(json.dumps(linha) + '\n' for linha in linhas).encode())
+        log.flush()
+        os.fsync(log.fileno())
+    if os.path.getsize(LOG_FILE) > LIMITE_LOG:
+        compactar_log()
+
+@instrumentado
+def gravar_snapshot(dados):
+    gravar_atomico(DATA_FILE, serializar(dados))
+    if os.path.exists(LOG_FILE):
+        os.remove(LOG_FILE)
+
+@instrumentado
+def compactar_log():
+    gravar_snapshot(carregar_snapshot())
+
+@instrumentado
+def carregar_snapshot():
+    conteudo = ler_snapshot()
+    dados = desserializar(conteudo)
+    mutacoes = ler_log(hash_snapshot(conteudo))
+    if mutacoes:
+        dados = aplicar_mutacoes(dados, mutacoes)
+    contar('registros_lidos', len(dados))
+    return dados
+
+# Desempenho dos cursos: um registro por linha (JSON Lines) no desempenho.jsonl,
+# lido em streaming. Ao lado fica um arquivo com os agregados por curso
+# (quantidade, soma e histograma de acertos) e o tamanho do log que eles já
+# cobrem; se o log cresceu além disso, só o trecho novo é somado.
+def migrar_desempenho():
+    # Converte o desempenho.json antigo (lista indentada) para JSON Lines
+    linhas = b''
     if os.path.exists(DESEMPENHO_FILE):
         with open(DESEMPENHO_FILE, 'r') as file:
-            return json.load(file)
-    return []
+            linhas = ''.join(json.dumps(d) + '\n' for d in json.load(file)).encode()
+    gravar_atomico(DESEMPENHO_LOG_FILE, linhas)
+
+def ler_desempenho(inicio=0):
+    if not os.path.exists(DESEMPENHO_LOG_FILE):
+        migrar_desempenho()
+    with open(DESEMPENHO_LOG_FILE, 'rb') as file:
+        file.seek(inicio)
+        lidos = 0
+        try:
+            for linha in file:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                lidos += 1
+                yield registro
+        finally:
+            contar('registros_lidos', lidos)
+
+# Registros de antes do banco de perguntas não têm 'total': o quiz tinha 3 perguntas
+PERGUNTAS_QUIZ_ANTIGO = 3
+
+def somar_agregado(cursos, registro):
+    curso = cursos.setdefault(registro['curso'], {'quantidade': 0, 'soma': 0, 'total': 0, 'histograma': {}})
+    curso['quantidade'] += 1
+    curso['soma'] += registro['acertos']
+    curso['total'] += registro.get('total') or PERGUNTAS_QUIZ_ANTIGO
+    acertos = str(registro['acertos'])
+    curso['histograma'][acertos] = curso['histograma'].get(acertos, 0) + 1
+
+def assinatura_desempenho():
+    # Identifica o arquivo do log, não só o tamanho: uma reescrita (gravar_atomico)
+    # troca o inode, e a primeira linha muda se o conteúdo for outro
+    with open(DESEMPENHO_LOG_FILE, 'rb') as file:
+        return [os.fstat(file.fileno()).st_ino, hashlib.sha256(file.readline()).hexdigest()]
+
+@instrumentado
+def carregar_agregado():
+    estado = {'tamanho': 0, 'cursos': {}}
+    if os.path.exists(AGREGADO_FILE):
+        with open(AGREGADO_FILE, 'r') as file:
+            estado = json.load(file)
+    if not os.path.exists(DESEMPENHO_LOG_FILE):
+        migrar_desempenho()
+    tamanho = os.path.getsize(DESEMPENHO_LOG_FILE)
+    assinatura = assinatura_desempenho()
+    # Agregado sem 'total' é de uma versão anterior: recalcula do zero
+    antigo = any('total' not in curso for curso in estado['cursos'].values())
+    if estado['tamanho'] != tamanho or estado.get('assinatura') != assinatura or antigo:
+        if estado['tamanho'] > tamanho or estado.get('assinatura') != assinatura or antigo:
+            estado = {'tamanho': 0, 'cursos': {}}  # log foi reescrito
+        for registro in ler_desempenho(estado['tamanho']):
+            somar_agregado(estado['cursos'], registro)
+        estado['tamanho'] = tamanho
+        estado['assinatura'] = assinatura
+        gravar_atomico(AGREGADO_FILE, json.dumps(estado).encode())
+    return estado
+
+def exportar_desempenho(caminho=DESEMPENHO_FILE):
+    # Gera o formato antigo (lista JSON indentada) só quando alguém pede
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as file:
+        file.write('[')
+        for i, registro in enumerate(armazenamento().iterar_desempenho()):
+            file.write(',\n' if i else '\n')
+            file.write('\n'.join('    ' + linha for linha in json.dumps(registro, indent=4).splitlines()))
+        file.write('\n]')
+    os.replace(temporario, caminho)
+    print(f"Desempenho exportado para {caminho}.")
+
+# Camada de armazenamento: o resto do sistema conversa com um backend, que pode
+# ser os arquivos JSON (padrão) ou um banco SQLite com índices. O backend é
+# escolhido pela variável de ambiente PIM_ARMAZENAMENTO ('json' ou 'sqlite').
+class ArmazenamentoJSON:
+    nome = 'json'
+
+    def __init__(self):
+        self.pendentes = []
+        self.trava = threading.Lock()
+        self.temporizador = None
+        self.tabela_consulta = None
+        atexit.register(self.descarregar_desempenho)
+
+    def _ler_usuarios(self):
+        if not os.path.exists(USERS_FILE):
+            gravar_atomico(USERS_FILE, b'{}')
+        with open(USERS_FILE, 'rb') as file:
+            return desserializar(file.read())
+
+    def carregar_usuarios(self):
+        with travar_arquivo(USERS_FILE, exclusiva=False):
+            return self._ler_usuarios()
+
+    def gravar_usuarios(self, usuarios):
+        with travar_arquivo(USERS_FILE):
+            gravar_atomico(USERS_FILE, serializar(usuarios))
+
+    def obter_senha(self, usuario):
+        return self.carregar_usuarios().get(usuario)
+
+    def salvar_usuario(self, usuario, senha_hash):
+        self.salvar_usuarios({usuario: senha_hash})
+
+    def salvar_usuarios(self, novos):
+        with travar_arquivo(USERS_FILE):
+            usuarios = self._ler_usuarios()
+            usuarios.update(novos)
+            gravar_atomico(USERS_FILE, serializar(usuarios))
+
+    def remover_usuario(self, usuario):
+        with travar_arquivo(USERS_FILE):
+            usuarios = self._ler_usuarios()
+            if usuario not in usuarios:
+                return False
+            del usuarios[usuario]
+            gravar_atomico(USERS_FILE, serializar(usuarios))
+            return True
+
+    def carregar_dados(self):
+        with travar_arquivo(DATA_FILE, exclusiva=False):
+            return carregar_snapshot()
+
+    def carregar_tabela(self, textos=True):
+        return TabelaUsuarios.de_registros(self.carregar_dados(), textos)
+
+    def consultar_usuarios(self, consulta):
+        # A tabela fica em memória entre as páginas e só é relida quando o
+        # dados.json ou o log mudam; cada página é então uma operação vetorizada.
+        # Ela é montada com os textos: os índices cegos ancoram o cursor
+        with travar_arquivo(DATA_FILE, exclusiva=False):
+            assinatura = tuple((estado.st_ino, estado.st_mtime_ns, estado.st_size)
+                               for estado in map(os.stat, (DATA_FILE, LOG_FILE) if os.path.exists(LOG_FILE)
+                                                 else (DATA_FILE,)))
+            guardada = self.tabela_consulta
+            if guardada is None or guardada[0] != assinatura:
+                guardada = self.tabela_consulta = (assinatura, TabelaUsuarios.de_registros(carregar_snapshot()))
+        return consulta_tabela(guardada[1], consulta)
+
+    def gravar_dados(self, dados):
+        with travar_arquivo(DATA_FILE):
+            gravar_snapshot(dados)
+
+    def atualizar_dados(self, funcao):
+        # Lê, altera e grava sem que outro processo escreva no meio
+        with travar_arquivo(DATA_FILE):
+            dados = carregar_snapshot()
+            gravar_snapshot(funcao(dados))
+
+    def atualizar_lote(self, inicio, tamanho, funcao):
+        # Aplica 'funcao' aos registros [inicio, inicio + tamanho) e devolve quantos eram
+        processados = 0
+
+        def aplicar(dados):
+            nonlocal processados
+            lote = dados[inicio:inicio + tamanho]
+            processados = len(lote)
+            return dados[:inicio] + funcao(lote) + dados[inicio + tamanho:]
+
+        self.atualizar_dados(aplicar)
+        return processados
+
+    def buscar_dado(self, indice):
+        dados = self.carregar_dados()
+        posicao = mapear_indices(dados).get(indice)
+        return None if posicao is None else dados[posicao]
+
+    def _registrar(self, mutacao):
+        with travar_arquivo(DATA_FILE):
+            registrar_mutacao(mutacao)
+
+    def inserir_dado(self, registro):
+        self._registrar({'op': 'inserir', 'registro': registro})
+
+    def inserir_dados(self, registros):
+        def acrescentar(dados):
+            mapa = mapear_indices(dados)
+            return dados + [r for r in registros if r.get('indice') not in mapa]
+        self.atualizar_dados(acrescentar)
+
+    def incrementar_dado(self, indice, campo, valor):
+        self._registrar({'op': 'incrementar', 'indice': indice, 'campo': campo, 'valor': valor})
+
+    def gravar_lote(self, mutacoes):
+        self._registrar({'op': 'lote', 'mutacoes': mutacoes})
+
+    def excluir_dado(self, indice):
+        self._registrar({'op': 'excluir', 'indice': indice})
+
+    def iterar_desempenho(self):
+        # O log só recebe linhas no fim; a leitura em streaming dispensa trava
+        self.descarregar_desempenho()
+        return ler_desempenho()
+
+    def agregados_desempenho(self):
+        self.descarregar_desempenho()
+        with travar_arquivo(DESEMPENHO_LOG_FILE):
+            return carregar_agregado()['cursos']
+
+    def gravar_desempenho(self, desempenho):
+        self.descarregar_desempenho()
+        with travar_arquivo(DESEMPENHO_LOG_FILE):
+            gravar_atomico(DESEMPENHO_LOG_FILE, ''.join(json.dumps(d) + '\n' for d in desempenho).encode())
+            if os.path.exists(AGREGADO_FILE):
+                os.remove(AGREGADO_FILE)  # os agregados antigos não valem para o log novo
+            carregar_agregado()
+
+    # Arquivos agrupados pela trava que os protege: cada grupo é lido (ou
+    # restaurado) numa aquisição só. O dados.log só vale junto com o dados.json
+    # sobre o qual foi escrito, então uma compactação entre as duas leituras
+    # deixaria no backup um log que a restauração descartaria.
+    ARQUIVOS_BACKUP = (
+        (DATA_FILE, (('dados.json', DATA_FILE), ('dados.log', LOG_FILE))),
+        (USERS_FILE, (('usuarios.json', USERS_FILE),)),
+        (DESEMPENHO_LOG_FILE, (('desempenho.jsonl', DESEMPENHO_LOG_FILE),)),
+    )
+
+    def arquivos_backup(self):
+        self.descarregar_desempenho()
+        arquivos = {}
+        for trava, grupo in self.ARQUIVOS_BACKUP:
+            with travar_arquivo(trava, exclusiva=False):
+                for nome, caminho in grupo:
+                    if os.path.exists(caminho):
+                        with open(caminho, 'rb') as file:
+                            arquivos[nome] = file.read()
+        return arquivos
+
+    def restaurar_arquivos(self, arquivos):
+        self.descarregar_desempenho()
+        for trava, grupo in self.ARQUIVOS_BACKUP:
+            with travar_arquivo(trava):
+                for nome, caminho in grupo:
+                    if nome in arquivos:
+                        gravar_atomico(caminho, arquivos[nome])
+                    elif os.path.exists(caminho):
+                        os.remove(caminho)
+                if trava == DESEMPENHO_LOG_FILE and os.path.exists(AGREGADO_FILE):
+                    os.remove(AGREGADO_FILE)  # recalculado a partir do log restaurado
+
+    def salvar_desempenho(self, registro):
+        with self.trava:
+            self.pendentes.append(registro)
+            cheio = len(self.pendentes) >= TAMANHO_FLUSH_DESEMPENHO
+            if not cheio and self.temporizador is None:
+                self.temporizador = threading.Timer(INTERVALO_FLUSH_DESEMPENHO, self.descarregar_desempenho)
+                self.temporizador.daemon = True
+                self.temporizador.start()
+        if cheio:
+            self.descarregar_desempenho()
+
+    def descarregar_desempenho(self):
+        with self.trava:
+            pendentes, self.pendentes = self.pendentes, []
+            if self.temporizador is not None:
+                self.temporizador.cancel()
+                self.temporizador = None
+            if not pendentes:
+                return
+            with travar_arquivo(DESEMPENHO_LOG_FILE):
+                estado = carregar_agregado()
+                linhas = ''.join(json.dumps(registro) + '\n' for registro in pendentes).encode()
+                with open(DESEMPENHO_LOG_FILE, 'ab') as file:
+                    file.write(linhas)
+                    file.flush()
+                    os.fsync(file.fileno())
+                for registro in pendentes:
+                    somar_agregado(estado['cursos'], registro)
+                estado['tamanho'] += len(linhas)
+                estado['assinatura'] = assinatura_desempenho()  # a primeira linha muda se o log estava vazio
+                gravar_atomico(AGREGADO_FILE, json.dumps(estado).encode())
+
+ESQUEMA_SQLITE = '''
+CREATE TABLE IF NOT EXISTS usuarios (
+    usuario TEXT PRIMARY KEY,
+    senha TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT,
+    indice TEXT UNIQUE,
+    idade INTEGER,
+    acessos INTEGER NOT NULL DEFAULT 0,
+    tempo_uso REAL NOT NULL DEFAULT 0,
+    senha TEXT,
+    tipo TEXT NOT NULL DEFAULT 'aluno'
+);
+CREATE INDEX IF NOT EXISTS idx_dados_tipo ON dados (tipo);
+CREATE TABLE IF NOT EXISTS desempenho (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    curso TEXT NOT NULL,
+    acertos INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    total INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_dados_idade ON dados (idade, id);
+CREATE INDEX IF NOT EXISTS idx_dados_acessos ON dados (acessos, id);
+CREATE INDEX IF NOT EXISTS idx_dados_tempo_uso ON dados (tempo_uso, id);
+CREATE INDEX IF NOT EXISTS idx_desempenho_curso ON desempenho (curso);
+CREATE INDEX IF NOT EXISTS idx_desempenho_data ON desempenho (data);
+'''
+
+class ArmazenamentoSQLite:
+    nome = 'sqlite'
+    CAMPOS_DADOS = ('nome', 'indice', 'idade', 'acessos', 'tempo_uso', 'senha', 'tipo')
+    CAMPOS_DESEMPENHO = ('usuario', 'curso', 'acertos', 'data', 'total')
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or SQLITE_FILE
+        self.trava = threading.Lock()
+        self.conexao = self._conectar()
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute('PRAGMA journal_mode=WAL')
+        conexao.executescript(ESQUEMA_SQLITE)
+        if 'total' not in {coluna['name'] for coluna in conexao.execute('PRAGMA table_info(desempenho)')}:
+            conexao.execute('ALTER TABLE desempenho ADD COLUMN total INTEGER')  # banco de antes do 'total'
+        return conexao
+
+    def _consultar(self, sql, parametros=()):
+        with self.trava:
+            return self.conexao.execute(sql, parametros).fetchall()
+
+    def _executar(self, sql, parametros=()):
+        with self.trava, self.conexao:
+            return self.conexao.execute(sql, parametros).rowcount
+
+    def _trocar_linhas(self, tabela, campos, linhas):
+        marcadores = ', '.join('?' for _ in campos)
+        self.conexao.execute(f'DELETE FROM {tabela}')
+        self.conexao.executemany(
+            f'INSERT INTO {tabela} ({", ".join(campos)}) VALUES ({marcadores})', linhas)
+
+    def _substituir(self, tabela, campos, linhas):
+        with self.trava, self.conexao:
+            self._trocar_linhas(tabela, campos, linhas)
+
+    def _registro(self, linha):
+        return {campo: linha[campo] for campo in self.CAMPOS_DADOS if linha[campo] is not None}
+
+    def carregar_usuarios(self):
+        return {linha['usuario']: linha['senha']
+                for linha in self._consultar('SELECT usuario, senha FROM usuarios')}
+
+    def gravar_usuarios(self, usuarios):
+        self._substituir('usuarios', ('usuario', 'senha'), usuarios.items())
+
+    def obter_senha(self, usuario):
+        linhas = self._consultar('SELECT senha FROM usuarios WHERE usuario = ?', (usuario,))
+        return linhas[0]['senha'] if linhas else None
+
+    def salvar_usuario(self, usuario, senha_hash):
+        self.salvar_usuarios({usuario: senha_hash})
+
+    def salvar_usuarios(self, novos):
+        with self.trava, self.conexao:
+            self.conexao.executemany('INSERT OR REPLACE INTO usuarios (usuario, senha) VALUES (?, ?)',
+                                     novos.items())
+
+    def remover_usuario(self, usuario):
+        return self._executar('DELETE FROM usuarios WHERE usuario = ?', (usuario,)) > 0
+
+    def carregar_dados(self):
+        dados = [self._registro(linha) for linha in self._consultar('SELECT * FROM dados ORDER BY id')]
+        contar('registros_lidos', len(dados))
+        return dados
+
+    def consultar_usuarios(self, consulta):
+        # Filtro, ordenação e paginação em SQL, com os índices de cada campo de
+        # ordenação: a primeira página não depende do tamanho da tabela
+        condicoes, parametros = [], []
+        for campo, operador in (('tipo', '='), ('idade_min', '>='), ('idade_max', '<='),
+                                ('acessos_min', '>='), ('acessos_max', '<=')):
+            if consulta[campo] is not None:
+                condicoes.append(f"{campo.split('_')[0]} {operador} ?")
+                parametros.append(consulta[campo])
+        ordenar = consulta['ordenar'] or 'id'
+        direcao, operador = ('DESC', '<') if consulta['decrescente'] else ('ASC', '>')
+        if consulta['ordenar']:
+            condicoes.append(f"{ordenar} IS NOT NULL")
+        if consulta['apos'] is not None:
+            valor, id = consulta['apos']
+            if isinstance(id, bool) or not isinstance(id, int) or (consulta['ordenar'] and valor is None):
+                raise ValueError("cursor inválido")
+            if consulta['ordenar']:
+                condicoes.append(f"({ordenar} {operador} ? OR ({ordenar} = ? AND id > ?))")
+                parametros += [valor, valor, id]
+            else:
+                condicoes.append(f"id {operador} ?")
+                parametros.append(id)
+        sql = (f"SELECT {', '.join(('id', f'{ordenar} AS chave_ordem') + consulta['colunas'])} FROM dados"
+               + (f" WHERE {' AND '.join(condicoes)}" if condicoes else '')
+               + f" ORDER BY {ordenar} {direcao}" + (", id ASC" if consulta['ordenar'] else '') + " LIMIT ?")
+        linhas = self._consultar(sql, parametros + [consulta['limite'] + 1])
+        registros = []
+        for linha in linhas[:consulta['limite']]:
+            registro = dict(linha)
+            del registro['chave_ordem']
+            registros.append(registro)
+        descriptografar_nomes(registros)
+        proximo = None
+        if len(linhas) > consulta['limite']:
+            ultimo = linhas[consulta['limite'] - 1]
+            proximo = codificar_cursor(consulta['ordenar'], consulta['decrescente'], ultimo['chave_ordem'], ultimo['id'])
+        return {'registros': registros, 'proximo': proximo}
+
+    def carregar_tabela(self, textos=True):
+        # Direto das linhas do SQLite para as colunas, sem passar por dicionários
+        if textos:
+            linhas = self._consultar('SELECT idade, acessos, tempo_uso, tipo, senha, nome, indice FROM dados ORDER BY id')
+        else:
+            linhas = self._consultar('SELECT idade, acessos, tempo_uso, tipo, senha FROM dados ORDER BY id')
+        contar('registros_lidos', len(linhas))
+        colunas = list(zip(*linhas)) if linhas else [()] * (7 if textos else 5)
+        idades, acessos, tempo_uso, tipos, senhas = colunas[:5]
+        nomes, indices = colunas[5:] or ((), ())
+        extras = {i: {'senha': senha} for i, senha in enumerate(senhas) if senha is not None}
+        return TabelaUsuarios(nomes, indices, idades, acessos, tempo_uso, tipos, extras)
+
+    def gravar_dados(self, dados):
+        self._substituir('dados', self.CAMPOS_DADOS,
+                         [tuple(d.get(campo) for campo in self.CAMPOS_DADOS) for d in dados])
+
+    def _regravar(self, linhas, funcao):
+        # Os registros vão para 'funcao' com o 'id'; só as linhas alteradas são
+        # regravadas, por id, então os ids (e os cursores da consulta) se mantêm
+        originais = {linha['id']: tuple(linha[campo] for campo in self.CAMPOS_DADOS) for linha in linhas}
+        alterados, novos, mantidos = [], [], set()
+        for d in funcao([dict(self._registro(linha), id=linha['id']) for linha in linhas]):
+            valores = tuple(d.get(campo) for campo in self.CAMPOS_DADOS)
+            if d.get('id') in originais:
+                mantidos.add(d['id'])
+                if valores != originais[d['id']]:
+                    alterados.append(valores + (d['id'],))
+            else:
+                novos.append(valores)
+        self.conexao.executemany(
+            f'UPDATE dados SET {", ".join(f"{campo} = ?" for campo in self.CAMPOS_DADOS)} WHERE id = ?', alterados)
+        self.conexao.executemany(
+            f'INSERT OR IGNORE INTO dados ({", ".join(self.CAMPOS_DADOS)}) '
+            f'VALUES ({", ".join("?" for _ in self.CAMPOS_DADOS)})', novos)
+        self.conexao.executemany('DELETE FROM dados WHERE id = ?', [(id,) for id in originais.keys() - mantidos])
+
+    def atualizar_dados(self, funcao):
+        with self.trava, self.conexao:
+            self.conexao.execute('BEGIN IMMEDIATE')
+            self._regravar(self.conexao.execute('SELECT * FROM dados ORDER BY id').fetchall(), funcao)
+
+    def atualizar_lote(self, inicio, tamanho, funcao):
+        with self.trava, self.conexao:
+            self.conexao.execute('BEGIN IMMEDIATE')
+            linhas = self.conexao.execute('SELECT * FROM dados ORDER BY id LIMIT ? OFFSET ?',
+                                          (tamanho, inicio)).fetchall()
+            self._regravar(linhas, funcao)
+            return len(linhas)
+
+    def buscar_dado(self, indice):
+        linhas = self._consultar('SELECT * FROM dados WHERE indice = ?', (indice,))
+        return self._registro(linhas[0]) if linhas else None
+
+    def inserir_dado(self, registro):
+        campos = [campo for campo in self.CAMPOS_DADOS if campo in registro]
+        marcadores = ', '.join('?' for _ in campos)
+        self._executar(f'INSERT OR IGNORE INTO dados ({", ".join(campos)}) VALUES ({marcadores})',
+                       [registro[campo] for campo in campos])
+
+    def inserir_dados(self, registros):
+        with self.trava, self.conexao:
+            self.conexao.executemany(
+                f'INSERT OR IGNORE INTO dados ({", ".join(self.CAMPOS_DADOS)}) '
+                f'VALUES ({", ".join("?" for _ in self.CAMPOS_DADOS)})',
+                [tuple(r.get(campo) for campo in self.CAMPOS_DADOS) for r in registros])
+
+    def incrementar_dado(self, indice, campo, valor):
+        if campo not in ('acessos', 'tempo_uso'):
+            raise ValueError(f"Campo não numérico: {campo}")
+        self._executar(f'UPDATE dados SET {campo} = {campo} + ? WHERE indice = ?', (valor, indice))
+
+    def gravar_lote(self, mutacoes):
+        # Mesmo formato das linhas do dados.log, tudo numa transação
+        for m in mutacoes:
+            if m['op'] not in ('incrementar', 'definir') or m['campo'] not in self.CAMPOS_DADOS:
+                raise ValueError(f"Mutação não suportada no lote: {m}")
+        with self.trava, self.conexao:
+            for m in mutacoes:
+                expressao = f"{m['campo']} + ?" if m['op'] == 'incrementar' else '?'
+                self.conexao.execute(f"UPDATE dados SET {m['campo']} = {expressao} WHERE indice = ?",
+                                     (m['valor'], m['indice']))
+
+    def excluir_dado(self, indice):
+        self._executar('DELETE FROM dados WHERE indice = ?', (indice,))
+
+    def iterar_desempenho(self):
+        with self.trava:
+            cursor = self.conexao.execute('SELECT usuario, curso, acertos, data, total FROM desempenho ORDER BY id')
+            linhas = cursor.fetchmany(1000)
+        while linhas:
+            contar('registros_lidos', len(linhas))
+            yield from ({campo: linha[campo] for campo in self.CAMPOS_DESEMPENHO if linha[campo] is not None}
+                        for linha in linhas)
+            with self.trava:
+                linhas = cursor.fetchmany(1000)
+
+    def agregados_desempenho(self):
+        cursos = {}
+        for linha in self._consultar('SELECT curso, acertos, COUNT(*) AS quantidade, '
+                                     'SUM(COALESCE(total, ?)) AS total FROM desempenho GROUP BY curso, acertos',
+                                     (PERGUNTAS_QUIZ_ANTIGO,)):
+            curso = cursos.setdefault(linha['curso'], {'quantidade': 0, 'soma': 0, 'total': 0, 'histograma': {}})
+            curso['quantidade'] += linha['quantidade']
+            curso['soma'] += linha['acertos'] * linha['quantidade']
+            curso['total'] += linha['total']
+            curso['histograma'][str(linha['acertos'])] = linha['quantidade']
+        return cursos
+
+    def gravar_desempenho(self, desempenho):
+        self._substituir('desempenho', self.CAMPOS_DESEMPENHO,
+                         [tuple(d.get(campo) for campo in self.CAMPOS_DESEMPENHO) for d in desempenho])
+
+    def descarregar_desempenho(self):
+        pass  # cada INSERT já é gravado na hora
+
+    def arquivos_backup(self):
+        # Cópia consistente do banco pela API de backup do SQLite
+        with tempfile.TemporaryDirectory() as pasta:
+            copia = sqlite3.connect(os.path.join(pasta, 'pim.db'))
+            with self.trava:
+                self.conexao.backup(copia)
+            copia.execute('PRAGMA journal_mode=DELETE')
+            copia.close()
+            with open(os.path.join(pasta, 'pim.db'), 'rb') as file:
+                return {'pim.db': file.read()}
+
+    def restaurar_arquivos(self, arquivos):
+        with self.trava:
+            self.conexao.close()
+            for sufixo in ('-wal', '-shm'):
+                if os.path.exists(self.caminho + sufixo):
+                    os.remove(self.caminho + sufixo)
+            gravar_atomico(self.caminho, arquivos['pim.db'])
+            self.conexao = self._conectar()
+
+    def salvar_desempenho(self, registro):
+        self._executar('INSERT INTO desempenho (usuario, curso, acertos, data, total) VALUES (?, ?, ?, ?, ?)',
+                       tuple(registro.get(campo) for campo in self.CAMPOS_DESEMPENHO))
+
+BACKENDS = {'json': ArmazenamentoJSON, 'sqlite': ArmazenamentoSQLite}
+_armazenamento = None
+
+def armazenamento():
+    global _armazenamento
+    if _armazenamento is None:
+        _armazenamento = BACKENDS[os.environ.get('PIM_ARMAZENAMENTO', 'json')]()
+    return _armazenamento
+
+def converter_armazenamento(origem, destino):
+    # Copia usuários, dados e desempenho de um backend para outro (ex.: json -> sqlite)
+    origem, destino = BACKENDS[origem](), BACKENDS[destino]()
+    destino.gravar_usuarios(origem.carregar_usuarios())
+    destino.gravar_dados(origem.carregar_dados())
+    destino.gravar_desempenho(list(origem.iterar_desempenho()))
+    print(f"Dados copiados de {origem.nome} para {destino.nome}.")
+
+@instrumentado
+def carregar_dados():
+    return armazenamento().carregar_dados()
+
+@instrumentado
+def gravar_dados(dados):
+    armazenamento().gravar_dados(dados)
 
+@instrumentado
+def atualizar_dados(funcao):
+    armazenamento().atualizar_dados(funcao)
+
+@instrumentado
+def carregar_desempenho():
+    return list(armazenamento().iterar_desempenho())
+
+@instrumentado
+def agregados_desempenho():
+    return armazenamento().agregados_desempenho()
+
+@instrumentado
+def descarregar_desempenho():
+    armazenamento().descarregar_desempenho()
+
+@instrumentado
 def salvar_dados(dado):
-    dados = carregar_dados()
-    dados.append(dado)
-    with open(DATA_FILE, 'w') as file:
-        json.dump(dados, file)
+    armazenamento().inserir_dado(dado)
+
+# Tabela de usuários em colunas: idade, acessos e tempo_uso em arrays do NumPy,
+# o tipo como código (uint8) numa lista de categorias, os nomes criptografados
+# concatenados num único bytes (com os offsets de fim de cada um) e os índices
+# cegos como 32 bytes crus cada. Campos fora desses ficam num dicionário à parte.
+# tabela[i] devolve uma LinhaUsuario, que se comporta como o dicionário de
+# sempre (só leitura), então quem recebia a lista de carregar_dados() funciona igual.
+class LinhaUsuario(Mapping):
+    __slots__ = ('tabela', 'posicao')
+
+    def __init__(self, tabela, posicao):
+        self.tabela = tabela
+        self.posicao = posicao
+
+    def __getitem__(self, campo):
+        valor = self.tabela.valor(self.posicao, campo)
+        if valor is None:
+            raise KeyError(campo)
+        return valor
+
+    def __iter__(self):
+        for campo in TabelaUsuarios.CAMPOS:
+            if self.tabela.valor(self.posicao, campo) is not None:
+                yield campo
+        yield from self.tabela.extras.get(self.posicao, ())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class TabelaUsuarios:
+    CAMPOS = ('nome', 'indice', 'idade', 'acessos', 'tempo_uso', 'tipo')
+    __slots__ = ('nomes', 'fim_nomes', 'indices', 'idade', 'acessos', 'tempo_uso', 'tipo', 'categorias',
+                 'extras', '_posicoes')
+
+    def __init__(self, nomes, indices, idades, acessos, tempo_uso, tipos, extras=None):
+        codificados = [(nome or '').encode() for nome in nomes]
+        self.nomes = b''.join(codificados)
+        self.fim_nomes = np.cumsum([len(nome) for nome in codificados], dtype=np.int64)
+        self.indices = b''.join(bytes.fromhex(indice) if indice else bytes(32) for indice in indices)
+        # idade -1 e tempo_uso NaN marcam campo ausente
+        self.idade = np.array([-1 if v is None else v for v in idades], dtype=np.int32)
+        self.acessos = np.array([v or 0 for v in acessos], dtype=np.int64)
+        self.tempo_uso = np.array([np.nan if v is None else v for v in tempo_uso], dtype=np.float64)
+        self.categorias = []
+        codigos = {}
+        for tipo in tipos:
+            if tipo not in codigos:
+                codigos[tipo] = len(self.categorias)
+                self.categorias.append(tipo)
+        self.tipo = np.array([codigos[tipo] for tipo in tipos], dtype=np.uint8)
+        self.extras = extras or {}
+        self._posicoes = None
+
+    @classmethod
+    def de_registros(cls, registros, textos=True):
+        # textos=False deixa de fora nome e índice: só as colunas numéricas e o tipo
+        conhecidos = set(cls.CAMPOS)
+        extras = {posicao: {c: v for c, v in registro.items() if c not in conhecidos}
+                  for posicao, registro in enumerate(registros) if not registro.keys() <= conhecidos}
+        nomes = indices = ()
+        if textos:
+            nomes = [r.get('nome') for r in registros]
+            indices = [r.get('indice') for r in registros]
+            for posicao, indice in enumerate(indices):
+                if indice is not None and len(indice) != 64:  # fora do formato HMAC-SHA256
+                    extras.setdefault(posicao, {})['indice'] = indice
+                    indices[posicao] = None
+        return cls(nomes, indices, [r.get('idade') for r in registros], [r.get('acessos') for r in registros],
+                   [r.get('tempo_uso') for r in registros], [r.get('tipo', 'aluno') for r in registros], extras)
+
+    def __len__(self):
+        return len(self.idade)
+
+    def __getitem__(self, posicao):
+        if posicao < 0:
+            posicao += len(self)
+        if not 0 <= posicao < len(self):
+            raise IndexError(posicao)
+        return LinhaUsuario(self, posicao)
+
+    def __iter__(self):
+        return (LinhaUsuario(self, posicao) for posicao in range(len(self)))
+
+    def valor(self, posicao, campo):
+        if campo == 'nome':
+            if not len(self.fim_nomes):
+                return None
+            inicio = int(self.fim_nomes[posicao - 1]) if posicao else 0
+            fim = int(self.fim_nomes[posicao])
+            return self.nomes[inicio:fim].decode() if fim > inicio else None
+        if campo == 'indice':
+            indice = self.indices[posicao * 32:(posicao + 1) * 32]
+            return indice.hex() if any(indice) else self.extras.get(posicao, {}).get('indice')
+        if campo == 'idade':
+            idade = int(self.idade[posicao])
+            return idade if idade >= 0 else None
+        if campo == 'acessos':
+            return int(self.acessos[posicao])
+        if campo == 'tempo_uso':
+            tempo = float(self.tempo_uso[posicao])
+            return None if tempo != tempo else tempo
+        if campo == 'tipo':
+            return self.categorias[self.tipo[posicao]]
+        return self.extras.get(posicao, {}).get(campo)
+
+    def buscar(self, indice):
+        # Linha do índice cego, ou None; o mapa é montado só na primeira busca
+        if len(self.indices) != 32 * len(self):
+            raise ValueError("tabela carregada sem os textos (textos=False)")
+        if self._posicoes is None:
+            self._posicoes = {self.indices[i:i + 32]: i // 32 for i in range(0, len(self.indices), 32)}
+        posicao = self._posicoes.get(bytes.fromhex(indice))
+        return None if posicao is None else LinhaUsuario(self, posicao)
+
+    def registros(self):
+        return [dict(linha) for linha in self]
+
+    def colunas(self):
+        # Mesmo formato de montar_colunas(): floats com NaN onde falta valor
+        idade = self.idade.astype(float)
+        idade[self.idade < 0] = np.nan
+        return {'idade': idade, 'acessos': self.acessos.astype(float), 'tempo_uso': self.tempo_uso,
+                'tipo': np.array(self.categorias or [''], dtype=str)[self.tipo]}
+
+    def tamanho_bytes(self):
+        return (len(self.nomes) + len(self.indices) + self.fim_nomes.nbytes + self.idade.nbytes
+                + self.acessos.nbytes + self.tempo_uso.nbytes + self.tipo.nbytes)
+
+@instrumentado
+def carregar_tabela(textos=True):
+    return armazenamento().carregar_tabela(textos)
+
+# Consulta paginada de usuários (opção "Consultar dados" e GET /admin/usuarios).
+# Filtros por tipo, faixa de idade e de acessos; ordenação por um campo numérico
+# (sem ele, ordem de cadastro) e paginação por cursor: o cursor guarda o valor e
+# a identificação estável da última linha (o id no SQLite, o índice cego no
+# JSON), então cada página continua de onde a outra parou sem contar linhas de
+# novo, mesmo que outras linhas sejam excluídas no meio. Só as colunas pedidas saem, e o nome só é
+# descriptografado quando 'nome' está entre elas. Quem não tem o campo de
+# ordenação fica fora da listagem ordenada por ele.
+CAMPOS_ORDENACAO = ('idade', 'acessos', 'tempo_uso')
+COLUNAS_CONSULTA = ('nome', 'idade', 'acessos', 'tempo_uso', 'tipo')
+COLUNAS_PADRAO = ('idade', 'acessos', 'tempo_uso', 'tipo')
+LIMITE_PAGINA = 1000
+
+def descriptografar_nomes(registros):
+    # Só a página pedida, num lote só (e só se a coluna 'nome' foi pedida)
+    com_nome = [registro for registro in registros if registro.get('nome')]
+    if not com_nome:
+        return
+    for registro, nome in zip(com_nome, descriptografar_varios([registro['nome'] for registro in com_nome])):
+        registro['nome'] = nome
+
+def codificar_cursor(ordenar, decrescente, valor, id):
+    return base64.urlsafe_b64encode(json.dumps([ordenar, decrescente, valor, id]).encode()).decode()
 
+def ler_cursor(cursor, ordenar, decrescente):
+    try:
+        ordem, ordem_decrescente, valor, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("cursor inválido")
+    if ordem != ordenar or ordem_decrescente != decrescente:
+        raise ValueError("o cursor é de uma consulta com outra ordenação")
+    if valor is not None and (isinstance(valor, bool) or not isinstance(valor, (int, float))):
+        raise ValueError("cursor inválido")
+    return valor, id
+
+def ancora_linha(tabela, posicao):
+    # Índice cego da linha (estável) e a posição, que só é usada quando ela não
+    # tem índice (registro antigo que não pôde ser migrado)
+    indice = tabela.indices[posicao * 32:(posicao + 1) * 32]
+    return [indice.hex() if any(indice) else None, posicao]
+
+def ler_ancora(ancora):
+    if (not isinstance(ancora, list) or len(ancora) != 2 or isinstance(ancora[1], bool)
+            or not isinstance(ancora[1], int) or not (ancora[0] is None or isinstance(ancora[0], str))):
+        raise ValueError("cursor inválido")
+    indice, posicao = ancora
+    if indice is None:
+        return b'', posicao
+    try:
+        indice = bytes.fromhex(indice)
+    except ValueError:
+        raise ValueError("cursor inválido")
+    if len(indice) != 32:
+        raise ValueError("cursor inválido")
+    return indice, posicao
+
+def localizar_ancora(tabela, ancora):
+    indice, posicao = ler_ancora(ancora)
+    if indice:
+        linha = tabela.buscar(indice.hex())
+        return None if linha is None else linha.posicao
+    return posicao if posicao < len(tabela) else None
+
+def retomar_cadastro(tabela, candidatos, ancoras, decrescente):
+    # Posição em 'candidatos' onde a próxima página começa
+    if not isinstance(ancoras, list) or len(ancoras) != 2:
+        raise ValueError("cursor inválido")
+    ultima, seguinte = (localizar_ancora(tabela, ancora) for ancora in ancoras)
+    if seguinte is not None:
+        posicao, depois = seguinte, False
+    elif ultima is not None:
+        posicao, depois = ultima, True
+    else:
+        raise ValueError("as linhas do cursor foram excluídas; recomece a consulta")
+    if decrescente:
+        return int(np.searchsorted(-candidatos, -posicao, side='right' if depois else 'left'))
+    return int(np.searchsorted(candidatos, posicao, side='right' if depois else 'left'))
+
+def consulta_tabela(tabela, consulta):
+    # Implementação vetorizada sobre a TabelaUsuarios (usada pelo armazenamento JSON)
+    mascara = np.ones(len(tabela), dtype=bool)
+    if consulta['tipo'] is not None:
+        if consulta['tipo'] not in tabela.categorias:
+            return {'registros': [], 'proximo': None}
+        mascara &= tabela.tipo == tabela.categorias.index(consulta['tipo'])
+    if consulta['idade_min'] is not None or consulta['idade_max'] is not None:
+        mascara &= tabela.idade >= 0  # idade -1: sem idade
+    for campo, coluna in (('idade', tabela.idade), ('acessos', tabela.acessos)):
+        if consulta[campo + '_min'] is not None:
+            mascara &= coluna >= consulta[campo + '_min']
+        if consulta[campo + '_max'] is not None:
+            mascara &= coluna <= consulta[campo + '_max']
+    # O cursor guarda índices cegos, não posições: excluir uma linha entre
+    # duas páginas desloca as posições seguintes, mas não muda os índices.
+    # Linha sem índice aparece como b'' e é ancorada pela posição
+    indices = np.frombuffer(tabela.indices, dtype='S32')
+    limite = consulta['limite']
+    if consulta['ordenar']:
+        chave = getattr(tabela, consulta['ordenar']).astype(float)
+        if consulta['ordenar'] == 'idade':
+            chave[tabela.idade < 0] = np.nan
+        mascara &= ~np.isnan(chave)
+        chave = -chave if consulta['decrescente'] else chave
+        if consulta['apos'] is not None:
+            valor, ancora = consulta['apos']
+            if valor is None:
+                raise ValueError("cursor inválido")
+            valor = -valor if consulta['decrescente'] else valor
+            indice, posicao = ler_ancora(ancora)
+            # Empate no valor: desempata pelo índice e, entre linhas sem índice, pela posição
+            posicoes = np.arange(len(tabela))
+            mascara &= (chave > valor) | ((chave == valor) & (
+                (indices > indice) | ((indices == indice) & (posicoes > posicao))))
+        candidatos = np.flatnonzero(mascara)
+        if len(candidatos) > limite + 1:
+            # Só as limite+1 menores chaves (e os empates) precisam ser ordenadas
+            limiar = np.partition(chave[candidatos], limite)[limite]
+            candidatos = candidatos[chave[candidatos] <= limiar]
+        ordem = candidatos[np.lexsort((candidatos, indices[candidatos], chave[candidatos]))][:limite + 1]
+    else:
+        # Ordem de cadastro: linhas novas só entram no fim, então a página
+        # seguinte começa onde está hoje a linha que viria depois da última
+        # mostrada (ou logo depois da última, se aquela foi excluída)
+        candidatos = np.flatnonzero(mascara)
+        if consulta['decrescente']:
+            candidatos = candidatos[::-1]
+        if consulta['apos'] is not None:
+            candidatos = candidatos[retomar_cadastro(tabela, candidatos, consulta['apos'][1],
+                                                     consulta['decrescente']):]
+        ordem = candidatos[:limite + 1]
+
+    registros = [{'id': posicao, **{coluna: tabela.valor(posicao, coluna) for coluna in consulta['colunas']}}
+                 for posicao in ordem[:limite].tolist()]
+    descriptografar_nomes(registros)
+    proximo = None
+    if len(ordem) > limite:
+        ultimo, seguinte = int(ordem[limite - 1]), int(ordem[limite])
+        if consulta['ordenar']:
+            valor, id = tabela.valor(ultimo, consulta['ordenar']), ancora_linha(tabela, ultimo)
+        else:
+            valor, id = None, [ancora_linha(tabela, ultimo), ancora_linha(tabela, seguinte)]
+        proximo = codificar_cursor(consulta['ordenar'], consulta['decrescente'], valor, id)
+    return {'registros': registros, 'proximo': proximo}
+
+@instrumentado
+def consultar_usuarios(tipo=None, idade_min=None, idade_max=None, acessos_min=None, acessos_max=None,
+                       ordenar=None, decrescente=False, limite=20, cursor=None, colunas=None):
+    colunas = tuple(colunas or COLUNAS_PADRAO)
+    for coluna in colunas:
+        if coluna not in COLUNAS_CONSULTA:
+            raise ValueError(f"coluna desconhecida: {coluna} (opções: {', '.join(COLUNAS_CONSULTA)})")
+    if ordenar is not None and ordenar not in CAMPOS_ORDENACAO:
+        raise ValueError(f"não dá para ordenar por {ordenar} (opções: {', '.join(CAMPOS_ORDENACAO)})")
+    if not 1 <= limite <= LIMITE_PAGINA:
+        raise ValueError(f"o tamanho da página deve ficar entre 1 e {LIMITE_PAGINA}")
+    consulta = {'tipo': tipo, 'idade_min': idade_min, 'idade_max': idade_max, 'acessos_min': acessos_min,
+                'acessos_max': acessos_max, 'ordenar': ordenar, 'decrescente': bool(decrescente),
+                'limite': limite, 'colunas': colunas,
+                'apos': ler_cursor(cursor, ordenar, bool(decrescente)) if cursor else None}
+    return armazenamento().consultar_usuarios(consulta)
+
+# Backups incrementais em BACKUP_DIR. Cada arquivo é dividido em blocos nas
+# fronteiras de registro (o corte depende só do conteúdo do registro, então uma
+# alteração num ponto não desloca os blocos seguintes); cada bloco é gravado
+# comprimido em objetos/ com o nome do seu SHA-256, e um backup é só um manifesto
+# com a lista de blocos de cada arquivo. Blocos que já existem não são regravados.
+FRONTEIRAS_REGISTRO = re.compile(rb'(?<=\}, )|(?<=", )|(?<=\n)')
+
+def dividir_blocos(conteudo, binario=False):
+    if binario:
+        return [conteudo[i:i + TAMANHO_BLOCO_BINARIO] for i in range(0, len(conteudo), TAMANHO_BLOCO_BINARIO)]
+    blocos, atual = [], []
+    for unidade in FRONTEIRAS_REGISTRO.split(conteudo):
+        if not unidade:
+            continue
+        atual.append(unidade)
+        if zlib.crc32(unidade) % MEDIA_REGISTROS_BLOCO == 0:
+            blocos.append(b''.join(atual))
+            atual = []
+    if atual:
+        blocos.append(b''.join(atual))
+    return blocos
+
+def caminho_objeto(chave):
+    return os.path.join(BACKUP_DIR, 'objetos', chave[:2], chave)
+
+def gravar_objeto(bloco):
+    chave = hashlib.sha256(bloco).hexdigest()
+    caminho = caminho_objeto(chave)
+    if os.path.exists(caminho):
+        return chave, 0
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    comprimido = zlib.compress(bloco)
+    gravar_atomico(caminho, comprimido)
+    return chave, len(comprimido)
+
+def ler_objeto(chave):
+    with open(caminho_objeto(chave), 'rb') as file:
+        return zlib.decompress(file.read())
+
+def listar_backups():
+    pasta = os.path.join(BACKUP_DIR, 'manifestos')
+    if not os.path.exists(pasta):
+        return []
+    return sorted(nome[:-len('.json')] for nome in os.listdir(pasta) if nome.endswith('.json'))
+
+def carregar_manifesto(backup_id):
+    with open(os.path.join(BACKUP_DIR, 'manifestos', backup_id + '.json'), 'r') as file:
+        return json.load(file)
+
+@instrumentado
 def criar_backup():
-    dados = carregar_dados()
-    with open(BACKUP_FILE, 'w') as file:
-        json.dump(dados, file)
-    print("Backup criado com sucesso.")
+    os.makedirs(os.path.join(BACKUP_DIR, 'manifestos'), exist_ok=True)
+    with travar_arquivo(BACKUP_DIR):
+        backups = listar_backups()
+        anterior = carregar_manifesto(backups[-1])['arquivos'] if backups else {}
+        backup_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        manifesto = {'id': backup_id, 'armazenamento': armazenamento().nome, 'arquivos': {}}
+        novos, gravados = 0, 0
+        for nome, conteudo in armazenamento().arquivos_backup().items():
+            hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+            if nome in anterior and anterior[nome]['hash'] == hash_arquivo:
+                manifesto['arquivos'][nome] = anterior[nome]  # arquivo não mudou
+                continue
+            blocos = []
+            for bloco in dividir_blocos(conteudo, binario=nome.endswith('.db')):
+                chave, tamanho = gravar_objeto(bloco)
+                blocos.append(chave)
+                novos += tamanho > 0
+                gravados += tamanho
+            manifesto['arquivos'][nome] = {'hash': hash_arquivo, 'tamanho': len(conteudo), 'blocos': blocos}
+        gravar_atomico(os.path.join(BACKUP_DIR, 'manifestos', backup_id + '.json'),
+                       json.dumps(manifesto).encode())
+        aplicar_retencao()
+    print(f"Backup criado com sucesso. ({backup_id}: {novos} blocos novos, {gravados / 1024:.1f} KB gravados)")
+    return backup_id
+
+def aplicar_retencao(ultimos=RETER_ULTIMOS_BACKUPS, dias=RETER_DIAS_BACKUPS):
+    # Mantém os últimos N backups e o último de cada dia dentro do prazo;
+    # depois apaga os blocos que nenhum backup mantido usa mais
+    backups = listar_backups()
+    manter = set(backups[-ultimos:])
+    ultimo_do_dia = {backup_id[:8]: backup_id for backup_id in backups}
+    limite = (datetime.now() - timedelta(days=dias)).strftime('%Y%m%d')
+    manter.update(backup_id for dia, backup_id in ultimo_do_dia.items() if dia >= limite)
+    for backup_id in backups:
+        if backup_id not in manter:
+            os.remove(os.path.join(BACKUP_DIR, 'manifestos', backup_id + '.json'))
+    usados = {chave for backup_id in manter
+              for arquivo in carregar_manifesto(backup_id)['arquivos'].values()
+              for chave in arquivo['blocos']}
+    pasta_objetos = os.path.join(BACKUP_DIR, 'objetos')
+    for prefixo in os.listdir(pasta_objetos) if os.path.exists(pasta_objetos) else []:
+        for chave in os.listdir(os.path.join(pasta_objetos, prefixo)):
+            if chave not in usados and not chave.endswith('.tmp'):
+                os.remove(os.path.join(pasta_objetos, prefixo, chave))
+
+@instrumentado
+def restaurar_backup(backup_id=None):
+    backups = listar_backups()
+    if not backups:
+        print("Nenhum backup encontrado.")
+        return
+    backup_id = backup_id or backups[-1]
+    manifesto = carregar_manifesto(backup_id)
+    arquivos = {}
+    for nome, info in manifesto['arquivos'].items():
+        conteudo = b''.join(ler_objeto(chave) for chave in info['blocos'])
+        if hashlib.sha256(conteudo).hexdigest() != info['hash']:
+            raise ValueError(f"Backup {backup_id} corrompido: {nome}")
+        arquivos[nome] = conteudo
+    destino = armazenamento()
+    if destino.nome != manifesto['armazenamento']:
+        destino = BACKENDS[manifesto['armazenamento']]()
+    destino.restaurar_arquivos(arquivos)
+    print(f"Backup {backup_id} restaurado.")
+
+# Estatísticas com NumPy: os campos numéricos viram colunas uma vez por carga e
+# cada resumo sai de poucas operações vetorizadas sobre essas colunas.
+CAMPOS_NUMERICOS = ('idade', 'acessos', 'tempo_uso')
+PERCENTIS = (25, 50, 75, 90)
+
+@instrumentado
+def montar_colunas(dados):
+    if isinstance(dados, TabelaUsuarios):
+        return dados.colunas()
+    colunas = {campo: np.array([d.get(campo, np.nan) for d in dados], dtype=float)
+               for campo in CAMPOS_NUMERICOS}
+    colunas['tipo'] = np.array([d.get('tipo', 'aluno') for d in dados], dtype=str)
+    return colunas
+
+@instrumentado
+def resumo_estatistico(valores, faixas=10):
+    valores = valores[~np.isnan(valores)]
+    if valores.size == 0:
+        return None
+    percentis = np.percentile(valores, PERCENTIS)
+    unicos, contagens = np.unique(valores, return_counts=True)
+    histograma, bordas = np.histogram(valores, bins=faixas)
+    return {
+        'quantidade': int(valores.size),
+        'media': float(valores.mean()),
+        'mediana': float(percentis[PERCENTIS.index(50)]),
+        'moda': float(unicos[contagens.argmax()]),
+        'desvio_padrao': float(valores.std()),
+        'percentis': dict(zip(PERCENTIS, percentis.tolist())),
+        'histograma': {'contagens': histograma.tolist(), 'bordas': bordas.tolist()},
+    }
+
+def resumo_histograma(histograma):
+    # Mesmo resumo, calculado direto do histograma de acertos dos agregados
+    valores = np.array([float(v) for v in histograma])
+    pesos = np.array(list(histograma.values()), dtype=float)
+    ordem = valores.argsort()
+    valores, pesos = valores[ordem], pesos[ordem]
+    total = pesos.sum()
+    media = (valores * pesos).sum() / total
+    acumulado = np.cumsum(pesos) / total
+    percentis = valores[np.searchsorted(acumulado, np.array(PERCENTIS) / 100)]
+    return {
+        'quantidade': int(total),
+        'media': float(media),
+        'mediana': float(percentis[PERCENTIS.index(50)]),
+        'moda': float(valores[pesos.argmax()]),
+        'desvio_padrao': float(np.sqrt((pesos * (valores - media) ** 2).sum() / total)),
+        'percentis': dict(zip(PERCENTIS, percentis.tolist())),
+        'histograma': {'contagens': pesos.astype(int).tolist(), 'valores': valores.tolist()},
+    }
+
+def mascaras_por_tipo(dados, colunas):
+    # Na tabela em colunas o tipo já é um código: não precisa ordenar strings
+    if isinstance(dados, TabelaUsuarios):
+        codigos = {tipo: codigo for codigo, tipo in enumerate(dados.categorias)}
+        return {tipo: dados.tipo == codigos[tipo] for tipo in sorted(codigos)}
+    return {str(g): colunas['tipo'] == g for g in np.unique(colunas['tipo'])}
+
+def resumo_por_grupo(valores, mascaras):
+    return {grupo: resumo_estatistico(valores[mascara]) for grupo, mascara in mascaras.items()}
 
 def analise_estatistica(valores):
-    return mean(valores), mode(valores), median(valores)
+    resumo = resumo_estatistico(np.asarray(valores, dtype=float))
+    return resumo['media'], resumo['moda'], resumo['mediana']
 
-def exibir_grafico(dados, titulo):
-    plt.figure(figsize=(8,6))
-    plt.bar(dados.keys(), dados.values(), color='skyblue')
-    plt.title(titulo)
-    plt.xticks(rotation=45, ha="right")
-    plt.ylim(0, max(dados.values()) + 5)
-    plt.tight_layout()
-    plt.show()
-
-def grafico_desempenho_por_curso():
-    desempenho = carregar_desempenho()
-    acertos_por_curso = defaultdict(list)
-
-    for d in desempenho:
-        acertos_por_curso[d['curso']].append(d['acertos'])
-
-   
+def imprimir_resumo(titulo, resumo):
+    if resumo is None:
+        print(f"{titulo}: sem dados suficientes.")
+        return
+    percentis = ', '.join(f"P{p}: {v:.2f}" for p, v in resumo['percentis'].items())
+    print(f"{titulo} ({resumo['quantidade']}) - Média: {resumo['media']:.2f}, Moda: {resumo['moda']:g}, "
+          f"Mediana: {resumo['mediana']:g}, Desvio padrão: {resumo['desvio_padrao']:.2f}, {percentis}")
+
+@instrumentado
+def resumo_estatisticas(dados, agregados):
+    colunas = montar_colunas(dados)
+    mascaras = mascaras_por_tipo(dados, colunas)
+    return {
+        'campos': {campo: {'geral': resumo_estatistico(colunas[campo]),
+                           'por_tipo': resumo_por_grupo(colunas[campo], mascaras)}
+                   for campo in CAMPOS_NUMERICOS},
+        'acertos_por_curso': {curso: resumo_histograma(agregado['histograma'])
+                              for curso, agregado in agregados.items()},
+    }
+
+@instrumentado
+def relatorio_estatistico(dados, agregados):
+    resumo = resumo_estatisticas(dados, agregados)
+    for campo, grupos in resumo['campos'].items():
+        print(f"\n--- {campo} ---")
+        imprimir_resumo("Geral", grupos['geral'])
+        for tipo, resumo_tipo in grupos['por_tipo'].items():
+            imprimir_resumo(f"Tipo {tipo}", resumo_tipo)
+    print("\n--- acertos por curso ---")
+    for curso, resumo_curso in resumo['acertos_por_curso'].items():
+        imprimir_resumo(curso, resumo_curso)
+
+# Gráficos: cada gráfico é descrito por um dicionário (rótulos, valores, título...)
+# e desenhado por desenhar_grafico. No modo 'janela' ele abre com plt.show();
+# no modo 'arquivo' (servidores sem tela) vira PNG/SVG em GRAFICOS_DIR, com nome
+# derivado do hash da descrição, então dados iguais nunca são desenhados de novo.
+@instrumentado
+def desenhar_grafico(grafico):
+    figura = plt.figure(figsize=grafico.get('tamanho'))
+    plt.bar(grafico['rotulos'], grafico['valores'], color=grafico['cor'])
+    plt.title(grafico['titulo'])
+    if 'xlabel' in grafico:
+        plt.xlabel(grafico['xlabel'])
+    if 'ylabel' in grafico:
+        plt.ylabel(grafico['ylabel'])
+    if grafico.get('rotacionar'):
+        plt.xticks(rotation=45, ha="right")
+    plt.ylim(*grafico['ylim'])
+    if grafico.get('tamanho'):
+        plt.tight_layout()
+    return figura
+
+def caminho_grafico(grafico):
+    chave = hashlib.sha256(json.dumps(grafico, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(GRAFICOS_DIR, f"{chave}.{FORMATO_GRAFICOS}")
+
+def renderizar_grafico(grafico):
+    caminho = caminho_grafico(grafico)
+    if not os.path.exists(caminho):
+        os.makedirs(GRAFICOS_DIR, exist_ok=True)
+        figura = desenhar_grafico(grafico)
+        figura.savefig(caminho + '.tmp', format=FORMATO_GRAFICOS)
+        plt.close(figura)
+        os.replace(caminho + '.tmp', caminho)
+    return caminho
+
+@instrumentado
+def renderizar_graficos(graficos):
+    pendentes = [g for g in graficos if not os.path.exists(caminho_grafico(g))]
+    if len(pendentes) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(len(pendentes), os.cpu_count() or 1)) as pool:
+            list(pool.map(renderizar_grafico, pendentes))
+    else:
+        for grafico in pendentes:
+            renderizar_grafico(grafico)
+    return [caminho_grafico(g) for g in graficos]
+
+@instrumentado
+def exibir_graficos(graficos):
+    if MODO_GRAFICOS == 'arquivo':
+        for grafico, caminho in zip(graficos, renderizar_graficos(graficos)):
+            print(f"{grafico['titulo']}: {caminho}")
+    else:
+        for grafico in graficos:
+            desenhar_grafico(grafico)
+            plt.show()
+
+def montar_grafico(dados, titulo):
+    return grafico_barras(list(dados.keys()), list(dados.values()), titulo)
+
+def grafico_barras(rotulos, valores, titulo):
+    return {
+        'titulo': titulo,
+        'rotulos': rotulos,
+        'valores': valores,
+        'cor': 'skyblue',
+        'rotacionar': True,
+        'tamanho': (8, 6),
+        'ylim': (0, max(valores, default=0) + 5),
+    }
+
+def montar_grafico_desempenho(agregados):
+    # Acertos sobre perguntas feitas: os quizzes têm tamanhos diferentes
     media_acertos = {
-        curso: (sum(acertos) / len(acertos)) / 3 * 10
-        for curso, acertos in acertos_por_curso.items()
+        curso: a['soma'] / a['total'] * 10
+        for curso, a in agregados.items() if a['total']
+    }
+    return {
+        'titulo': "Média de Desempenho por Curso (0 a 10)",
+        'rotulos': list(media_acertos.keys()),
+        'valores': list(media_acertos.values()),
+        'cor': 'lightgreen',
+        'xlabel': "Curso",
+        'ylabel': "Nota Média",
+        'ylim': (0, 10),
     }
 
-    plt.bar(media_acertos.keys(), media_acertos.values(), color='lightgreen')
-    plt.title("Média de Desempenho por Curso (0 a 10)")
-    plt.xlabel("Curso")
-    plt.ylabel("Nota Média")
-    plt.ylim(0, 10)
-    plt.show()
-
-def grafico_alunos_por_curso():
-    desempenho = carregar_desempenho()
-    cursos = [d['curso'] for d in desempenho]
-    contagem = Counter(cursos)
-    plt.bar(contagem.keys(), contagem.values(), color='lightblue')
-    plt.title("Quantidade de Alunos por Curso")
-    plt.xlabel("Curso")
-    plt.ylabel("Número de Alunos")
-    plt.show()
+def montar_grafico_alunos(agregados):
+    contagem = {curso: a['quantidade'] for curso, a in agregados.items()}
+    return {
+        'titulo': "Quantidade de Alunos por Curso",
+        'rotulos': list(contagem.keys()),
+        'valores': list(contagem.values()),
+        'cor': 'lightblue',
+        'xlabel': "Curso",
+        'ylabel': "Número de Alunos",
+        'ylim': (0, max(contagem.values(), default=0) * 1.1 or 1),
+    }
 
-def exibir_grafico_tempo(dados, titulo):
-    max_val = max(dados.values()) if dados else 0
+def montar_grafico_tempo(dados, titulo):
+    return grafico_tempo(list(dados.values()), titulo)
+
+def grafico_tempo(valores, titulo):
+    max_val = max(valores) if valores else 0
     if max_val < 1:  # menos de 1 hora
-        dados_ajustados = {f"Usuário {i+1}": v * 60 for i, (k, v) in enumerate(dados.items())}
+        dados_ajustados = {f"Usuário {i+1}": v * 60 for i, v in enumerate(valores)}
         unidade = "minutos"
     else:
-        dados_ajustados = {f"Usuário {i+1}": v for i, (k, v) in enumerate(dados.items())}
+        dados_ajustados = {f"Usuário {i+1}": v for i, v in enumerate(valores)}
         unidade = "horas"
+    return {
+        'titulo': f"{titulo} ({unidade})",
+        'rotulos': list(dados_ajustados.keys()),
+        'valores': list(dados_ajustados.values()),
+        'cor': 'skyblue',
+        'rotacionar': True,
+        'tamanho': (8, 6),
+        'ylim': (0, max(dados_ajustados.values(), default=0) * 1.1 or 1),  # margem para visualização
+    }
 
-    plt.figure(figsize=(8,6))
-    plt.bar(dados_ajustados.keys(), dados_ajustados.values(), color='skyblue')
-    plt.title(f"{titulo} ({unidade})")
-    plt.xticks(rotation=45, ha="right")
-    plt.ylim(0, max(dados_ajustados.values()) * 1.1)  # margem para visualização
-    plt.tight_layout()
-    plt.show()
+def exibir_grafico(dados, titulo):
+    exibir_graficos([montar_grafico(dados, titulo)])
 
-def hash_senha(senha):
-    return hashlib.sha256(senha.encode()).hexdigest()
+def grafico_desempenho_por_curso(agregados=None):
+    if agregados is None:
+        agregados = agregados_desempenho()
+    exibir_graficos([montar_grafico_desempenho(agregados)])
 
-def carregar_usuarios():
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r') as file:
-            return json.load(file)
+def grafico_alunos_por_curso(agregados=None):
+    if agregados is None:
+        agregados = agregados_desempenho()
+    exibir_graficos([montar_grafico_alunos(agregados)])
+
+def exibir_grafico_tempo(dados, titulo):
+    exibir_graficos([montar_grafico_tempo(dados, titulo)])
+
+@instrumentado
+def graficos_administrador(dados, agregados):
+    # Os cinco gráficos da opção "Criar gráfico" do administrador
+    if isinstance(dados, TabelaUsuarios):
+        return graficos_administrador_colunas(dados, agregados)
+    idades = {}
+    acessos = {}
+    tempo_uso = {}
+
+    for i, d in enumerate(dados):
+        nome = f"Usuário {i+1}"
+        if 'idade' in d:
+            idades[nome] = d['idade']
+        if 'acessos' in d:
+            acessos[nome] = d['acessos']
+        if 'tempo_uso' in d:
+            tempo_uso[nome] = d['tempo_uso']
+
+    return [
+        montar_grafico(idades, "Idades dos Usuários"),
+        montar_grafico(acessos, "Número de Acessos"),
+        montar_grafico_tempo(tempo_uso, "Tempo Médio de Uso"),
+        montar_grafico_desempenho(agregados),
+        montar_grafico_alunos(agregados),
+    ]
+
+def graficos_administrador_colunas(tabela, agregados):
+    # Mesmos gráficos, lidos direto das colunas; usuários sem o campo ficam de fora
+    rotulos = [f"Usuário {i+1}" for i in range(len(tabela))]
+
+    def coluna(valores, presentes):
+        if presentes.all():
+            return rotulos, valores.tolist()
+        return [rotulos[i] for i in np.flatnonzero(presentes)], valores[presentes].tolist()
+
+    tempo_presente = ~np.isnan(tabela.tempo_uso)
+    return [
+        grafico_barras(*coluna(tabela.idade, tabela.idade >= 0), "Idades dos Usuários"),
+        grafico_barras(rotulos, tabela.acessos.tolist(), "Número de Acessos"),
+        grafico_tempo(tabela.tempo_uso[tempo_presente].tolist(), "Tempo Médio de Uso"),
+        montar_grafico_desempenho(agregados),
+        montar_grafico_alunos(agregados),
+    ]
+
+CUSTO_HASH = {'scrypt': ('n', 2 ** 14, 2 ** 17), 'pbkdf2_sha256': ('iteracoes', 100_000, 5_000_000)}
+_parametros_hash = None
+
+def derivar_senha(senha, sal, parametros):
+    if parametros['algoritmo'] == 'scrypt':
+        n, r, p = parametros['n'], parametros['r'], parametros['p']
+        return hashlib.scrypt(senha.encode(), salt=sal, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+    return hashlib.pbkdf2_hmac('sha256', senha.encode(), sal, parametros['iteracoes'])
+
+def calibrar_custo(alvo_ms=ALVO_HASH_MS):
+    # Dobra o custo a partir do mínimo até uma derivação levar alvo_ms
+    if hasattr(hashlib, 'scrypt'):
+        parametros = {'algoritmo': 'scrypt', 'r': 8, 'p': 1}
     else:
-        with open(USERS_FILE, 'w') as file:
-            json.dump({}, file)
-        return {}
+        parametros = {'algoritmo': 'pbkdf2_sha256'}
+    campo, minimo, maximo = CUSTO_HASH[parametros['algoritmo']]
+    parametros[campo] = minimo
+    while parametros[campo] < maximo:
+        inicio = time.perf_counter()
+        derivar_senha('calibracao', b'0' * 16, parametros)
+        if (time.perf_counter() - inicio) * 1000 >= alvo_ms:
+            break
+        parametros[campo] *= 2
+    return parametros
+
+def parametros_hash():
+    global _parametros_hash
+    if _parametros_hash is None:
+        if os.path.exists(HASH_PARAMS_FILE):
+            with open(HASH_PARAMS_FILE, 'r') as file:
+                _parametros_hash = json.load(file)
+        else:
+            _parametros_hash = calibrar_custo()
+            gravar_atomico(HASH_PARAMS_FILE, json.dumps(_parametros_hash).encode())
+    return _parametros_hash
+
+@instrumentado
+def hash_senha(senha, parametros=None):
+    # Formato: algoritmo$custo...$sal$hash (sal e hash em base64)
+    parametros = parametros or parametros_hash()
+    sal = secrets.token_bytes(16)
+    if parametros['algoritmo'] == 'scrypt':
+        custo = [parametros['n'], parametros['r'], parametros['p']]
+    else:
+        custo = [parametros['iteracoes']]
+    digest = derivar_senha(senha, sal, parametros)
+    return '$'.join([parametros['algoritmo'], *map(str, custo),
+                     base64.b64encode(sal).decode(), base64.b64encode(digest).decode()])
+
+def ler_hash(senha_hash):
+    partes = senha_hash.split('$')
+    if len(partes) == 1:
+        return {'algoritmo': 'sha256'}, None, partes[0]  # formato antigo, sem sal
+    if partes[0] == 'scrypt':
+        n, r, p = map(int, partes[1:4])
+        parametros = {'algoritmo': 'scrypt', 'n': n, 'r': r, 'p': p}
+    else:
+        parametros = {'algoritmo': partes[0], 'iteracoes': int(partes[1])}
+    return parametros, base64.b64decode(partes[-2]), base64.b64decode(partes[-1])
+
+@instrumentado
+def conferir_senha(senha, senha_hash):
+    parametros, sal, esperado = ler_hash(senha_hash)
+    if parametros['algoritmo'] == 'sha256':
+        return hmac.compare_digest(hashlib.sha256(senha.encode()).hexdigest(), esperado)
+    return hmac.compare_digest(derivar_senha(senha, sal, parametros), esperado)
+
+def precisa_novo_hash(senha_hash):
+    parametros, _, _ = ler_hash(senha_hash)
+    atuais = parametros_hash()
+    if parametros['algoritmo'] != atuais['algoritmo']:
+        return True
+    campo = CUSTO_HASH[atuais['algoritmo']][0]
+    return parametros[campo] < atuais[campo]
+
+def carregar_usuarios():
+    return armazenamento().carregar_usuarios()
 
 def salvar_usuario(usuario, senha):
-    usuarios = carregar_usuarios()
-    usuarios[usuario] = hash_senha(senha)
-    with open(USERS_FILE, 'w') as file:
-        json.dump(usuarios, file)
+    armazenamento().salvar_usuario(usuario, hash_senha(senha))
+
 def registrar_usuario_com_dados(usuario, senha, nome, idade, tipo='aluno'):
     salvar_usuario(usuario, senha)
-    dados = carregar_dados()
-    for d in dados:
-        if descriptografar(d['nome']) == usuario:
-            return  # já existe
-    dados.append({
+    if armazenamento().buscar_dado(indice_cego(usuario)) is not None:
+        return  # já existe
+    salvar_dados({
         'nome': criptografar(usuario),
+        'indice': indice_cego(usuario),
         'idade': idade,
         'acessos': 0,
         'tempo_uso': 0,
-        'senha': criptografar(senha),
         'tipo': tipo
     })
-    with open(DATA_FILE, 'w') as file:
-        json.dump(dados, file)
 
-def verificar_login(usuario, senha):
+# Importação em lote de alunos a partir de CSV ou JSON Lines (colunas usuario,
+# senha, nome, idade e tipo opcional). Os hashes de senha são calculados em
+# paralelo e usuários e dados são gravados de uma vez só no fim.
+def ler_linhas_importacao(caminho):
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as file:
+        if caminho.lower().endswith(('.jsonl', '.json')):
+            for linha in file:
+                if linha.strip():
+                    yield linha  # decodificada em validar_linha_importacao, linha a linha
+        else:
+            yield from csv.DictReader(file)
+
+def validar_linha_importacao(linha):
+    if isinstance(linha, str):
+        try:
+            linha = json.loads(linha)
+        except json.JSONDecodeError:
+            raise ValueError("JSON inválido")
+    if not isinstance(linha, dict):
+        raise ValueError("a linha deve ser um objeto JSON")
+    usuario = str(linha.get('usuario') or '').strip()
+    senha = str(linha.get('senha') or '')
+    if not usuario or not senha:
+        raise ValueError("usuário e senha são obrigatórios")
+    try:
+        idade = int(linha.get('idade'))
+    except (TypeError, ValueError):
+        raise ValueError("idade inválida")
+    if not 0 < idade < 150:
+        raise ValueError("idade fora do intervalo")
+    tipo = str(linha.get('tipo') or 'aluno').strip().lower()
+    if tipo not in ('admin', 'aluno'):
+        raise ValueError(f"tipo inválido: {tipo}")
+    return {'usuario': usuario, 'senha': senha, 'idade': idade, 'tipo': tipo}
+
+@instrumentado
+def importar_alunos(caminho):
+    inicio = time.perf_counter()
     usuarios = carregar_usuarios()
-    return usuario in usuarios and usuarios[usuario] == hash_senha(senha)
+    indices = mapear_indices(carregar_dados())
+    validas, invalidas, duplicadas = [], [], 0
+    for numero, linha in enumerate(ler_linhas_importacao(caminho), start=1):
+        try:
+            aluno = validar_linha_importacao(linha)
+        except ValueError as erro:
+            invalidas.append((numero, str(erro)))
+            continue
+        aluno['indice'] = indice_cego(aluno['usuario'])
+        if aluno['usuario'] in usuarios or aluno['indice'] in indices:
+            duplicadas += 1
+            continue
+        usuarios[aluno['usuario']] = None  # reserva o nome para as próximas linhas
+        indices[aluno['indice']] = None
+        validas.append(aluno)
+
+    senhas = [aluno['senha'] for aluno in validas]
+    parametros = parametros_hash()
+    if len(validas) > 8:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor() as pool:
+            hashes = list(pool.map(hash_senha, senhas, [parametros] * len(senhas),
+                                   chunksize=max(1, len(senhas) // ((os.cpu_count() or 1) * 4))))
+    else:
+        hashes = [hash_senha(senha, parametros) for senha in senhas]
+    nomes = criptografar_varios([aluno['usuario'] for aluno in validas])
+
+    if validas:
+        armazenamento().salvar_usuarios({aluno['usuario']: h for aluno, h in zip(validas, hashes)})
+        armazenamento().inserir_dados([{
+            'nome': nome,
+            'indice': aluno['indice'],
+            'idade': aluno['idade'],
+            'acessos': 0,
+            'tempo_uso': 0,
+            'tipo': aluno['tipo']
+        } for aluno, nome in zip(validas, nomes)])
+
+    decorrido = time.perf_counter() - inicio
+    total = len(validas) + len(invalidas) + duplicadas
+    for numero, erro in invalidas[:10]:
+        print(f"Linha {numero}: {erro}")
+    print(f"{len(validas)} importados, {duplicadas} já existentes, {len(invalidas)} inválidos "
+          f"({total / decorrido:.1f} linhas/s)")
+    return {'importados': len(validas), 'duplicados': duplicadas, 'invalidos': len(invalidas),
+            'linhas_por_segundo': total / decorrido}
+
+@instrumentado
+def verificar_login(usuario, senha):
+    senha_hash = armazenamento().obter_senha(usuario)
+    if senha_hash is None or not conferir_senha(senha, senha_hash):
+        return False
+    if precisa_novo_hash(senha_hash):
+        # Hash antigo ou mais fraco que o custo atual: regrava com a senha recém-conferida
+        armazenamento().salvar_usuario(usuario, hash_senha(senha))
+    return True
 
 def obter_tipo_usuario(usuario):
-    dados = carregar_dados()
-    for d in dados:
-        if descriptografar(d['nome']) == usuario:
-            return d.get('tipo', 'aluno')
+    registro = armazenamento().buscar_dado(indice_cego(usuario))
+    if registro is not None:
+        return registro.get('tipo', 'aluno')
     return 'aluno'
 
 def atualizar_tempo_uso(usuario, tempo_uso):
-    dados = carregar_dados()
-    for d in dados:
-        if descriptografar(d['nome']) == usuario:
-            d['tempo_uso'] += tempo_uso
-            break
-    with open(DATA_FILE, 'w') as file:
-        json.dump(dados, file)
+    armazenamento().incrementar_dado(indice_cego(usuario), 'tempo_uso', tempo_uso)
 
 def incrementar_acessos(usuario):
-    dados = carregar_dados()
-    for d in dados:
-        if descriptografar(d['nome']) == usuario:
-            d['acessos'] += 1
-            break
-    with open(DATA_FILE, 'w') as file:
-        json.dump(dados, file)
+    armazenamento().incrementar_dado(indice_cego(usuario), 'acessos', 1)
 
 def excluir_usuario(usuario):
-    usuarios = carregar_usuarios()
-    dados = carregar_dados()
-
-    if usuario not in usuarios:
+    if not armazenamento().remover_usuario(usuario):
         print(f"Usuário '{usuario}' não encontrado em usuarios.json.")
         return
-
-    del usuarios[usuario]
-    with open(USERS_FILE, 'w') as file:
-        json.dump(usuarios, file)
     print(f"Usuário '{usuario}' removido de usuarios.json.")
 
-    dados = [d for d in dados if descriptografar(d['nome']) != usuario]
-    with open(DATA_FILE, 'w') as file:
-        json.dump(dados, file)
+    armazenamento().excluir_dado(indice_cego(usuario))
     print(f"Usuário '{usuario}' removido de dados.json.")
 
-from datetime import datetime
-
-DESEMPENHO_FILE = os.path.join(BASE_DIR, 'desempenho.json')
 
-def salvar_desempenho(usuario, curso, acertos):
-    desempenho = []
-    if os.path.exists(DESEMPENHO_FILE):
-        with open(DESEMPENHO_FILE, 'r') as file:
-            desempenho = json.load(file)
-    desempenho.append({
+def salvar_desempenho(usuario, curso, acertos, total):
+    armazenamento().salvar_desempenho({
         'usuario': usuario,
         'curso': curso,
         'acertos': acertos,
+        'total': total,
         'data': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
-    with open(DESEMPENHO_FILE, 'w') as file:
-        json.dump(desempenho, file, indent=4)
+
+# Sessão de um usuário logado (unidade de trabalho): o registro dele é lido uma
+# vez só no login e as alterações (acessos, tempo de uso) ficam em memória,
+# somadas por campo. Elas vão para o armazenamento num lote só no logout ou a
+# cada INTERVALO_SESSAO segundos, junto com o desempenho pendente; o tempo de
+# uso é contado até cada descarga. O lote é atômico (uma linha do dados.log,
+# uma transação no SQLite), então uma queda perde no máximo o último intervalo.
+INTERVALO_SESSAO = float(os.environ.get('PIM_SESSAO_INTERVALO', 60))
+
+class Sessao:
+    __slots__ = ('usuario', 'indice', 'registro', 'alteracoes', 'marcador', 'intervalo', 'trava',
+                 'temporizador', 'aberta')
+
+    def __init__(self, usuario, registro, intervalo=INTERVALO_SESSAO):
+        self.usuario = usuario
+        self.indice = indice_cego(usuario)
+        self.registro = registro  # None: usuário sem linha em dados.json
+        self.alteracoes = {}
+        self.marcador = time.time()
+        self.intervalo = intervalo
+        self.trava = threading.Lock()
+        self.temporizador = None
+        self.aberta = True
+        self._agendar()
+
+    @property
+    def tipo(self):
+        return self.registro.get('tipo', 'aluno') if self.registro is not None else 'aluno'
+
+    def _agendar(self):
+        if self.intervalo:
+            self.temporizador = threading.Timer(self.intervalo, self.descarregar)
+            self.temporizador.daemon = True
+            self.temporizador.start()
+
+    def incrementar(self, campo, valor):
+        with self.trava:
+            self.alteracoes[campo] = self.alteracoes.get(campo, 0) + valor
+            if self.registro is not None:
+                self.registro[campo] = self.registro.get(campo, 0) + valor
+
+    @instrumentado
+    def descarregar(self, encerrar=False):
+        with self.trava:
+            if self.temporizador is not None:
+                self.temporizador.cancel()
+                self.temporizador = None
+            if not self.aberta:
+                return
+            agora = time.time()
+            alteracoes, self.alteracoes = self.alteracoes, {}
+            alteracoes['tempo_uso'] = alteracoes.get('tempo_uso', 0) + (agora - self.marcador) / 3600
+            if self.registro is not None:
+                try:
+                    armazenamento().gravar_lote([{'op': 'incrementar', 'indice': self.indice, 'campo': campo,
+                                                  'valor': valor} for campo, valor in alteracoes.items()])
+                except Exception:
+                    # Nada foi gravado: as alterações voltam para a próxima descarga
+                    for campo, valor in alteracoes.items():
+                        if campo != 'tempo_uso':
+                            self.alteracoes[campo] = self.alteracoes.get(campo, 0) + valor
+                    if self.aberta and not encerrar:
+                        self._agendar()
+                    raise
+                self.registro['tempo_uso'] = self.registro.get('tempo_uso', 0) + (agora - self.marcador) / 3600
+            self.marcador = agora
+            armazenamento().descarregar_desempenho()
+            if encerrar:
+                self.aberta = False
+            else:
+                self._agendar()
+
+    def encerrar(self):
+        self.descarregar(encerrar=True)
+
+    def descartar(self):
+        # Conta excluída durante a sessão: não há mais onde gravar
+        with self.trava:
+            if self.temporizador is not None:
+                self.temporizador.cancel()
+                self.temporizador = None
+            self.alteracoes = {}
+            self.aberta = False
+
+@instrumentado
+def abrir_sessao(usuario, senha, intervalo=INTERVALO_SESSAO):
+    if not verificar_login(usuario, senha):
+        return None
+    sessao = Sessao(usuario, armazenamento().buscar_dado(indice_cego(usuario)), intervalo)
+    sessao.incrementar('acessos', 1)
+    return sessao
+
+# Banco de perguntas: cursos, textos e quizzes vêm de PERGUNTAS_FILE (JSON ou
+# TOML), lido uma vez só. Cada curso tem 'id', 'titulo' (nome exibido), 'curso'
+# (nome gravado no desempenho), 'conteudo', 'perguntas' e, opcionalmente,
+# 'sortear' (quantas perguntas sortear por tentativa; sem ele, todas).
+class Pergunta:
+    __slots__ = ('texto', 'opcoes', 'alternativas', 'certa')
+
+    def __init__(self, texto, opcoes, certa):
+        self.texto = texto
+        self.opcoes = tuple(opcoes)
+        self.alternativas = ' '.join(f"({chr(97 + i)}) {opcao}" for i, opcao in enumerate(self.opcoes))
+        self.certa = certa
+
+class Quiz:
+    # 'gabarito' guarda a letra certa de cada pergunta como um byte: conferir a
+    # resposta i é uma comparação só, e a correção em lote vira uma operação do numpy
+    __slots__ = ('id', 'titulo', 'curso', 'conteudo', 'perguntas', 'gabarito', 'sortear', '_gabarito_np')
+
+    def __init__(self, id, titulo, curso, conteudo, perguntas, sortear=None):
+        self.id = id
+        self.titulo = titulo
+        self.curso = curso
+        self.conteudo = conteudo
+        self.perguntas = tuple(perguntas)
+        self.gabarito = bytes(ord(p.certa) for p in self.perguntas)
+        self.sortear = min(sortear or len(self.perguntas), len(self.perguntas))
+        self._gabarito_np = None
+
+    def gabarito_np(self):
+        if self._gabarito_np is None:
+            self._gabarito_np = np.frombuffer(self.gabarito, dtype=np.uint8)
+        return self._gabarito_np
+
+_banco = None
+
+def ler_banco(caminho):
+    if caminho.endswith('.toml'):
+        import tomllib
+        with open(caminho, 'rb') as file:
+            bruto = tomllib.load(file)
+    else:
+        with open(caminho, 'r', encoding='utf-8') as file:
+            bruto = json.load(file)
+    banco = {}
+    for curso in bruto['cursos']:
+        perguntas = []
+        for numero, p in enumerate(curso['perguntas'], start=1):
+            letras = [chr(97 + i) for i in range(len(p['opcoes']))]
+            if p['certa'] not in letras:
+                raise ValueError(f"{caminho}: curso '{curso['id']}', pergunta {numero}: "
+                                 f"resposta '{p['certa']}' fora das opções {letras}")
+            perguntas.append(Pergunta(p['pergunta'], p['opcoes'], p['certa']))
+        if curso['id'] in banco:
+            raise ValueError(f"{caminho}: curso '{curso['id']}' repetido")
+        banco[curso['id']] = Quiz(curso['id'], curso['titulo'], curso.get('curso', curso['titulo']),
+                                  curso.get('conteudo', "Conteúdo não disponível."), perguntas, curso.get('sortear'))
+    return banco
+
+def banco_perguntas():
+    global _banco
+    if _banco is None:
+        _banco = ler_banco(PERGUNTAS_FILE)
+    return _banco
+
+def sortear_perguntas(quiz):
+    # Índices das perguntas de uma tentativa, na ordem em que serão feitas
+    if quiz.sortear == len(quiz.perguntas):
+        return list(range(len(quiz.perguntas)))
+    return sorted(random.sample(range(len(quiz.perguntas)), quiz.sortear))
+
+def codificar_respostas(respostas, tamanho):
+    # Uma resposta por byte (a letra em minúsculo); resposta vazia ou inválida vira 0
+    if isinstance(respostas, str) and len(respostas) == tamanho and respostas.isascii():
+        return respostas.lower().encode()
+    linha = bytearray(tamanho)
+    for i, resposta in enumerate(list(respostas)[:tamanho]):
+        resposta = str(resposta).strip().lower()
+        if len(resposta) == 1 and resposta.isascii():
+            linha[i] = ord(resposta)
+    return bytes(linha)
+
+def corrigir_quiz(quiz_id, respostas, indices=None):
+    quiz = banco_perguntas()[quiz_id]
+    if indices is None:
+        indices = range(len(quiz.perguntas))
+    codigos = codificar_respostas(respostas, len(indices))
+    return sum(1 for codigo, i in zip(codigos, indices) if quiz.gabarito[i] == codigo)
+
+@instrumentado
+def corrigir_lote(quiz_id, lote, indices=None):
+    # Corrige várias tentativas de uma vez. 'lote' é uma lista de respostas (listas
+    # ou strings como "bab"); 'indices' é None (todas as perguntas), uma lista de
+    # índices comum a todas ou uma lista por tentativa. Devolve os acertos (numpy).
+    quiz = banco_perguntas()[quiz_id]
+    if indices is None:
+        indices = np.arange(len(quiz.perguntas))
+    indices = np.asarray(indices, dtype=np.intp)
+    tamanho = indices.shape[-1]
+    if not len(lote):
+        return np.zeros(0, dtype=np.int64)
+    matriz = np.frombuffer(b''.join(codificar_respostas(r, tamanho) for r in lote),
+                           dtype=np.uint8).reshape(len(lote), tamanho)
+    return (matriz == quiz.gabarito_np()[indices]).sum(axis=1)
+
+def aplicar_quiz(quiz_id, usuario):
+    quiz = banco_perguntas()[quiz_id]
+    indices = sortear_perguntas(quiz)
+    print(f"\n--- {quiz.titulo} ---")
+    respostas = []
+    for numero, i in enumerate(indices, start=1):
+        pergunta = quiz.perguntas[i]
+        print(f"{numero}) {pergunta.texto}")
+        respostas.append(input(f"{pergunta.alternativas}: ").lower())
+    acertos = corrigir_quiz(quiz_id, respostas, indices)
+    print(f"\nVocê acertou {acertos} de {len(indices)} perguntas.")
+    salvar_desempenho(usuario, quiz.curso, acertos, len(indices))
 
 def exibir_cursos():
+    quizzes = list(banco_perguntas().values())
     while True:
         print("\n--- Cursos Disponíveis ---")
-        print("1. Pensamento Lógico Computacional")
-        print("2. Programação em Python")
-        print("3. Segurança Digital")
+        for numero, quiz in enumerate(quizzes, start=1):
+            print(f"{numero}. {quiz.titulo}")
         print("0. Voltar ao menu anterior")
         escolha = input("Escolha um curso: ")
 
-        if escolha == '1':
-            resultado = mostrar_conteudo("Pensamento Lógico Computacional")
-            if resultado == "continuar":
-                curso_logica(usuario)
-            elif resultado == "voltar":
-                continue
-
-        elif escolha == '2':
-            resultado = mostrar_conteudo("Programação em Python")
-            if resultado == "continuar":
-                curso_python(usuario)
-            elif resultado == "voltar":
-                continue
-
-        elif escolha == '3':
-            resultado = mostrar_conteudo("Segurança Digital")
-            if resultado == "continuar":
-                curso_seguranca(usuario)
-            elif resultado == "voltar":
-                continue
-
-        elif escolha == '0':
+        if escolha == '0':
             break
+        elif escolha.isdigit() and 1 <= int(escolha) <= len(quizzes):
+            quiz = quizzes[int(escolha) - 1]
+            if mostrar_conteudo(quiz) == "continuar":
+                aplicar_quiz(quiz.id, usuario)
         else:
             print("Opção inválida.")
 
-textos_intro = {
-    "Pensamento Lógico Computacional": "Pensamento Lógico Computacional é a habilidade de resolver problemas de forma estruturada e eficiente. Ele envolve a compreensão e aplicação de conceitos como algoritmos, estruturas de controle (como loops e condicionais) e decomposição de problemas complexos em partes menores e mais gerenciáveis. Essa habilidade é fundamental para o desenvolvimento de sistemas e programas de computador, pois permite que os desenvolvedores criem soluções eficazes e otimizadas para diversos tipos de problemas. No curso de Pensamento Lógico Computacional, os alunos aprenderão a identificar e definir problemas, desenvolver algoritmos para solucioná-los e implementar esses algoritmos em código. Além disso, serão abordados conceitos como variáveis, operadores, estruturas de repetição e condicionais, que são essenciais para a criação de programas funcionais. Ao final do curso, os alunos estarão aptos a aplicar o pensamento lógico computacional em diversas áreas da tecnologia da informação, contribuindo para a inovação e eficiência no desenvolvimento de soluções tecnológicas.",
-    "Programação em Python": "Programação em Python é uma introdução à linguagem de programação Python, que é conhecida por sua simplicidade e versatilidade. Python é amplamente utilizado em diversas áreas, desde desenvolvimento web até ciência de dados e inteligência artificial. A linguagem possui uma sintaxe clara e concisa, o que facilita o aprendizado e a aplicação prática dos conceitos de programação. No curso de Programação em Python, os alunos aprenderão a escrever e executar programas em Python, utilizando comandos básicos como print e input, e estruturas de controle como loops e condicionais. Além disso, serão abordados conceitos como tipos de dados, variáveis, funções e bibliotecas, que são essenciais para o desenvolvimento de programas mais complexos. Ao final do curso, os alunos estarão aptos a criar programas funcionais e eficientes, aplicando os conhecimentos adquiridos em projetos reais.",
-    "Segurança Digital": "Segurança Digital envolve práticas e medidas para proteger sistemas, redes e dados contra-ataques, danos ou acesso não autorizado. É essencial para garantir a integridade, confidencialidade e disponibilidade das informações. Com o aumento da dependência da tecnologia, a segurança digital tornou-se uma preocupação fundamental para indivíduos e organizações. No curso de Segurança Digital, os alunos aprenderão sobre as principais ameaças à segurança digital, como malware, phishing e ataques de força bruta, e as melhores práticas para proteger-se contra essas ameaças. Serão abordados conceitos como criptografia, autenticação, controle de acesso e backup de dados, que são essenciais para garantir a segurança das informações. Ao final do curso, os alunos estarão aptos a implementar medidas de segurança eficazes em seus sistemas e redes, contribuindo para a proteção das informações e a prevenção de ataques."
-}
-            
-def curso_logica(usuario):
-    print("\n--- Pensamento Lógico Computacional ---")
-    acertos = 0
-
-    print("1) Qual estrutura usamos para repetir ações?")
-    r1 = input("(a) if (b) for (c) print: ").lower()
-    if r1 == 'b':
-        acertos += 1
-
-    print("2) Qual estrutura usamos para tomar decisões?")
-    r2 = input("(a) if (b) while (c) print: ").lower()
-    if r2 == 'a':
-        acertos += 1
-
-    print("3) Qual dessas é uma estrutura de repetição?")
-    r3 = input("(a) else (b) for (c) def: ").lower()
-    if r3 == 'b':
-        acertos += 1
-
-    print(f"\nVocê acertou {acertos} de 3 perguntas.")
-    salvar_desempenho(usuario, "Lógica Computacional", acertos)
-
-
-def curso_python(usuario):
-    print("\n--- Programação em Python ---")
-    acertos = 0
-
-    print("1) Qual comando usamos para mostrar algo na tela?")
-    r1 = input("(a) input (b) print (c) def: ").lower()
-    if r1 == 'b':
-        acertos += 1
-
-    print("2) Qual símbolo usamos para comentários?")
-    r2 = input("(a) // (b) <!-- (c) #: ").lower()
-    if r2 == 'c':
-        acertos += 1
-
-    print("3) Qual tipo representa números inteiros?")
-    r3 = input("(a) str (b) int (c) float: ").lower()
-    if r3 == 'b':
-        acertos += 1
-
-    print(f"\nVocê acertou {acertos} de 3 perguntas.")
-    salvar_desempenho(usuario, "Python", acertos)
-
-
-def curso_seguranca(usuario):
-    print("\n--- Segurança Digital ---")
-    acertos = 0
-
-    print("1) Qual dessas é uma boa prática de segurança?")
-    r1 = input("(a) Usar a mesma senha (b) Compartilhar senha (c) Usar senhas fortes: ").lower()
-    if r1 == 'c':
-        acertos += 1
-
-    print("2) O que é phishing?")
-    r2 = input("(a) Um tipo de vírus (b) Um golpe por e-mail (c) Um antivírus: ").lower()
-    if r2 == 'b':
-        acertos += 1
-
-    print("3) O que é backup?")
-    r3 = input("(a) Atualizar o sistema (b) Salvar cópia dos dados (c) Apagar arquivos: ").lower()
-    if r3 == 'b':
-        acertos += 1
-
-    print(f"\nVocê acertou {acertos} de 3 perguntas.")
-    salvar_desempenho(usuario, "Segurança Digital", acertos)
-
-def mostrar_conteudo(curso):
+def mostrar_conteudo(quiz):
     while True:
-        print(f"\nVocê escolheu o curso: {curso}")
+        print(f"\nVocê escolheu o curso: {quiz.titulo}")
         print("O que deseja fazer?")
         print("1. Ler o conteúdo do curso")
         print("2. Voltar ao menu principal")
@@ -357,7 +2406,7 @@ def mostrar_conteudo(curso):
 
         if escolha == "1":
             print("\n--- Conteúdo ---")
-            print(textos_intro.get(curso, "Conteúdo não disponível."))
+            print(quiz.conteudo)
         elif escolha == "2":
             return "voltar"
         elif escolha == "3":
@@ -365,7 +2414,220 @@ def mostrar_conteudo(curso):
         else:
             print("Opção inválida. Tente novamente.")
 
+# Modo servidor: API HTTP local (JSON) sobre asyncio, só com a biblioteca padrão.
+# Cada conexão é atendida no loop de eventos; hash de senha, criptografia e disco
+# rodam num pool de threads para não travar as outras conexões.
+asyncio = ModuloPreguicoso('asyncio')
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+RAZOES_HTTP = {200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden',
+               404: 'Not Found', 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+def ler_filtros_consulta(caminho):
+    # ?tipo=aluno&idade_min=18&ordenar=acessos&decrescente=1&limite=50&cursor=...&colunas=nome,idade
+    from urllib.parse import parse_qs, urlsplit
+    parametros = {nome: valores[-1] for nome, valores in parse_qs(urlsplit(caminho).query).items()}
+    filtros = {}
+    for nome, valor in parametros.items():
+        if nome in ('idade_min', 'idade_max', 'acessos_min', 'acessos_max', 'limite'):
+            try:
+                filtros[nome] = int(valor)
+            except ValueError:
+                raise ValueError(f"{nome} deve ser um número inteiro")
+        elif nome == 'decrescente':
+            filtros[nome] = valor.lower() in ('1', 'true', 's', 'sim')
+        elif nome == 'colunas':
+            filtros[nome] = [coluna for coluna in valor.split(',') if coluna]
+        elif nome in ('tipo', 'ordenar', 'cursor'):
+            filtros[nome] = valor
+        else:
+            raise ValueError(f"parâmetro desconhecido: {nome}")
+    return filtros
+
+class ServidorPIM:
+    def __init__(self, threads=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self.sessoes = {}
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    async def bloqueante(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    def sessao(self, cabecalhos):
+        token = cabecalhos.get('authorization', '').removeprefix('Bearer ').strip()
+        return self.sessoes.get(token)
+
+    async def atender(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                metodo, caminho, _ = linha.decode('latin-1').split(' ', 2)
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get('content-length', 0))
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    status, resposta = 413, {'erro': "corpo muito grande"}
+                else:
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b''
+                    try:
+                        status, resposta = await self.tratar(metodo, caminho, cabecalhos, corpo)
+                    except Exception as erro:
+                        status, resposta = 500, {'erro': str(erro)}
+                conteudo = json.dumps(resposta).encode()
+                escritor.write(f"HTTP/1.1 {status} {RAZOES_HTTP[status]}\r\n"
+                               f"Content-Type: application/json; charset=utf-8\r\n"
+                               f"Content-Length: {len(conteudo)}\r\n\r\n".encode() + conteudo)
+                await escritor.drain()
+                if status == 413 or cabecalhos.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def tratar(self, metodo, caminho, cabecalhos, corpo):
+        partes = [parte for parte in caminho.split('?')[0].split('/') if parte]
+        try:
+            dados = json.loads(corpo) if corpo else {}
+        except json.JSONDecodeError:
+            return 400, {'erro': "JSON inválido"}
+        if not isinstance(dados, dict):
+            return 400, {'erro': "o corpo deve ser um objeto JSON"}
+        sessao = self.sessao(cabecalhos)
+        banco = banco_perguntas()
+
+        if metodo == 'POST' and partes == ['registrar']:
+            return await self.registrar(dados)
+        if metodo == 'POST' and partes == ['login']:
+            return await self.login(dados)
+        if metodo == 'GET' and partes == ['cursos']:
+            return 200, [{'id': quiz.id, 'titulo': quiz.titulo} for quiz in banco.values()]
+        if metodo == 'GET' and len(partes) == 2 and partes[0] == 'cursos' and partes[1] in banco:
+            quiz = banco[partes[1]]
+            # O cliente devolve os 'indice' sorteados junto com as respostas
+            return 200, {'id': quiz.id, 'titulo': quiz.titulo, 'conteudo': quiz.conteudo,
+                         'perguntas': [{'indice': i, 'pergunta': quiz.perguntas[i].texto,
+                                        'opcoes': quiz.perguntas[i].alternativas}
+                                       for i in sortear_perguntas(quiz)]}
+        if sessao is None:
+            return 401, {'erro': "faça login e envie 'Authorization: Bearer <token>'"}
+        if metodo == 'POST' and partes == ['logout']:
+            self.sessoes.pop(cabecalhos['authorization'].removeprefix('Bearer ').strip())
+            await self.bloqueante(atualizar_tempo_uso, sessao['usuario'], (time.time() - sessao['inicio']) / 3600)
+            return 200, {'mensagem': "Sessão encerrada."}
+        if metodo == 'POST' and len(partes) == 2 and partes[0] == 'quiz' and partes[1] in banco:
+            quiz = banco[partes[1]]
+            indices = dados.get('perguntas', list(range(len(quiz.perguntas))))
+            if (not isinstance(indices, list) or len(set(indices)) != len(indices)
+                    or not all(isinstance(i, int) and 0 <= i < len(quiz.perguntas) for i in indices)):
+                return 400, {'erro': "'perguntas' deve listar índices distintos do quiz"}
+            respostas = dados.get('respostas', [])
+            if not (isinstance(respostas, str)
+                    or isinstance(respostas, list) and all(isinstance(r, str) for r in respostas)):
+                return 400, {'erro': "'respostas' deve ser um texto ou uma lista de textos"}
+            acertos = corrigir_quiz(quiz.id, respostas, indices)
+            await self.bloqueante(salvar_desempenho, sessao['usuario'], quiz.curso, acertos, len(indices))
+            return 200, {'acertos': acertos, 'total': len(indices)}
+        if metodo == 'GET' and partes == ['admin', 'usuarios']:
+            if sessao['tipo'] != 'admin':
+                return 403, {'erro': "apenas administradores"}
+            try:
+                filtros = ler_filtros_consulta(caminho)
+                return 200, await self.bloqueante(lambda: consultar_usuarios(**filtros))
+            except ValueError as erro:
+                return 400, {'erro': str(erro)}
+        if metodo == 'GET' and partes == ['admin', 'estatisticas']:
+            if sessao['tipo'] != 'admin':
+                return 403, {'erro': "apenas administradores"}
+            return 200, await self.bloqueante(lambda: resumo_estatisticas(carregar_tabela(textos=False), agregados_desempenho()))
+        return 404, {'erro': "rota não encontrada"}
+
+    async def registrar(self, dados):
+        try:
+            aluno = validar_linha_importacao({**dados, 'tipo': 'aluno'})  # admins só pelo terminal
+        except ValueError as erro:
+            return 400, {'erro': str(erro)}
+        if await self.bloqueante(armazenamento().obter_senha, aluno['usuario']) is not None:
+            return 409, {'erro': "usuário já existe"}
+        await self.bloqueante(registrar_usuario_com_dados, aluno['usuario'], aluno['senha'],
+                              dados.get('nome', ''), aluno['idade'], 'aluno')
+        return 201, {'mensagem': "Usuário registrado com sucesso!"}
+
+    async def login(self, dados):
+        usuario, senha = str(dados.get('usuario', '')), str(dados.get('senha', ''))
+        if not await self.bloqueante(verificar_login, usuario, senha):
+            return 401, {'erro': "Usuário ou senha incorretos."}
+        await self.bloqueante(incrementar_acessos, usuario)
+        tipo = await self.bloqueante(obter_tipo_usuario, usuario)
+        token = secrets.token_urlsafe(32)
+        self.sessoes[token] = {'usuario': usuario, 'tipo': tipo, 'inicio': time.time()}
+        return 200, {'token': token, 'tipo': tipo}
+
+def iniciar_servidor(porta=8080, host='127.0.0.1'):
+    executar_migracoes()
+    servidor = ServidorPIM()
+
+    async def rodar():
+        conexoes = await asyncio.start_server(servidor.atender, host, porta)
+        print(f"Servidor PIM em http://{host}:{porta}", flush=True)
+        async with conexoes:
+            await conexoes.serve_forever()
+
+    try:
+        asyncio.run(rodar())
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+
+def perguntar_numero(mensagem):
+    resposta = input(mensagem).strip()
+    return int(resposta) if resposta else None
+
+def consultar_dados():
+    # Listagem paginada da opção 2 do administrador; Enter pula cada filtro
+    try:
+        filtros = {
+            'tipo': input("Filtrar por tipo (admin/aluno, Enter para todos): ").strip().lower() or None,
+            'idade_min': perguntar_numero("Idade mínima (Enter para ignorar): "),
+            'idade_max': perguntar_numero("Idade máxima (Enter para ignorar): "),
+            'acessos_min': perguntar_numero("Mínimo de acessos (Enter para ignorar): "),
+            'ordenar': input("Ordenar por (idade/acessos/tempo_uso, Enter para ordem de cadastro): ").strip() or None,
+        }
+    except ValueError:
+        print("Valor inválido.")
+        return
+    if filtros['ordenar']:
+        filtros['decrescente'] = input("Ordem decrescente? (s/n): ").strip().lower() == 's'
+    colunas = COLUNAS_PADRAO
+    if input("Mostrar nomes? (s/n): ").strip().lower() == 's':
+        colunas = ('nome',) + COLUNAS_PADRAO
+
+    cursor = None
+    while True:
+        try:
+            pagina = consultar_usuarios(**filtros, colunas=colunas, cursor=cursor)
+        except ValueError as erro:
+            print(f"Consulta inválida: {erro}")
+            return
+        if not pagina['registros'] and cursor is None:
+            print("Nenhum usuário encontrado.")
+            return
+        print(f"\n{'id':>8}  " + '  '.join(f"{coluna:>12}" for coluna in colunas))
+        for registro in pagina['registros']:
+            valores = ('' if registro[c] is None else f"{registro[c]:.2f}" if isinstance(registro[c], float)
+                       else str(registro[c]) for c in colunas)
+            print(f"{registro['id']:>8}  " + '  '.join(f"{valor:>12}" for valor in valores))
+        cursor = pagina['proximo']
+        if cursor is None or input("Enter para a próxima página, 0 para voltar: ").strip() == '0':
+            return
+
 def main():
+    executar_migracoes()
     while True:
         print("Bem-vindo! Por favor, faça login ou registre-se.")
         print("1. Login")
@@ -373,18 +2635,17 @@ def main():
         print("3. Sair")
         opcao = input("Escolha uma opção: ")
 
-        login_time = None
+        sessao = None
 
         if opcao == '1':
             global usuario
             usuario = input("Usuário: ")
             senha = getpass.getpass("Senha: ")
-            if not verificar_login(usuario, senha):
+            sessao = abrir_sessao(usuario, senha)
+            if sessao is None:
                 print("Usuário ou senha incorretos.")
                 continue
-            incrementar_acessos(usuario)
-            tipo_usuario = obter_tipo_usuario(usuario)
-            login_time = time.time()
+            tipo_usuario = sessao.tipo
             print("Dica de segurança: Nunca compartilhe sua senha com ninguém. Este sistema não solicita senhas por e-mail ou mensagens.")
 
 
@@ -430,6 +2691,13 @@ def main():
 
                 if tipo_usuario == 'admin':
                     if opcao == '1':
+                        caminho = input("Arquivo CSV/JSONL para importar (Enter para cadastrar um aluno): ").strip()
+                        if caminho:
+                            if os.path.exists(caminho):
+                                importar_alunos(caminho)
+                            else:
+                                print("Arquivo não encontrado.")
+                            continue
                         nome = input("Nome do aluno: ")
                         idade = int(input("Idade: "))
                         aluno_usuario = input("Usuário do aluno: ")
@@ -438,40 +2706,15 @@ def main():
                         print("Aluno cadastrado com sucesso!")
                     elif opcao == '2':
                         print("Aviso: Os dados exibidos estão em conformidade com a LGPD e são utilizados apenas para fins acadêmicos.")
-                        dados = carregar_dados()
-                        for i, d in enumerate(dados, start=1):
-                            d['nome'] = f"Usuário {i}"
-                            d['senha'] = "Dado protegido pela LGPD"
-                        print("Dados:", dados)
+                        consultar_dados()
                     elif opcao == '3':
-                        dados = carregar_dados()
-                        idades = [d['idade'] for d in dados if 'idade' in d]
-                        if idades:
-                            media, moda, mediana = analise_estatistica(idades)
-                            print(f"Média: {media}, Moda: {moda}, Mediana: {mediana}")
+                        dados = carregar_tabela(textos=False)
+                        if dados:
+                            relatorio_estatistico(dados, agregados_desempenho())
                         else:
                             print("Sem dados suficientes.")
                     elif opcao == '4':
-                        dados = carregar_dados()
-
-                        idades = {}
-                        acessos = {}
-                        tempo_uso = {}
-
-                        for i, d in enumerate(dados):
-                            nome = f"Usuário {i+1}"
-                            if 'idade' in d:
-                                idades[nome] = d['idade']
-                            if 'acessos' in d:
-                                acessos[nome] = d['acessos']
-                            if 'tempo_uso' in d:
-                                tempo_uso[nome] = d['tempo_uso']
-
-                        exibir_grafico(idades, "Idades dos Usuários")
-                        exibir_grafico(acessos, "Número de Acessos")
-                        exibir_grafico_tempo(tempo_uso, "Tempo Médio de Uso")
-                        grafico_desempenho_por_curso()
-                        grafico_alunos_por_curso()
+                        exibir_graficos(graficos_administrador(carregar_tabela(textos=False), agregados_desempenho()))
 
                     elif opcao == '5':
                         criar_backup()
@@ -504,6 +2747,7 @@ def main():
                     elif opcao == '3':
                         confirmar = input("Tem certeza que deseja excluir sua conta? (s/n): ").lower()
                         if confirmar == 's':
+                            sessao.descartar()
                             excluir_usuario(usuario)
                             print("Sua conta foi excluída. Encerrando sessão...")
                             break
@@ -513,10 +2757,57 @@ def main():
                     else:
                         print("Opção inválida.")
         finally:
-            if login_time:
-                logout_time = time.time()
-                tempo_uso = (logout_time - login_time) / 3600
-                atualizar_tempo_uso(usuario, tempo_uso)
+            if sessao:
+                sessao.encerrar()
+
+if os.environ.get('PIM_INSTRUMENTAR'):
+    ativar_instrumentacao(os.environ.get('PIM_METRICAS'))
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Sistema PIM - cadastro e análise de usuários")
+    parser.add_argument('--converter', nargs=2, metavar=('ORIGEM', 'DESTINO'), choices=list(BACKENDS),
+                        help="copia os dados entre armazenamentos (json, sqlite) e sai")
+    parser.add_argument('--rotacionar-chave', action='store_true',
+                        help="cria uma chave nova, recriptografa os dados com ela e sai")
+    parser.add_argument('--exportar-desempenho', nargs='?', const=DESEMPENHO_FILE, metavar='ARQUIVO',
+                        help="grava o desempenho no formato JSON indentado antigo e sai")
+    parser.add_argument('--listar-backups', action='store_true', help="lista os backups disponíveis e sai")
+    parser.add_argument('--restaurar-backup', nargs='?', const='', metavar='ID',
+                        help="restaura um backup (o mais recente se ID for omitido) e sai")
+    parser.add_argument('--importar-alunos', metavar='ARQUIVO', help="importa alunos de um CSV/JSONL e sai")
+    parser.add_argument('--servidor', nargs='?', type=int, const=8080, metavar='PORTA',
+                        help="sobe a API HTTP local (padrão: porta 8080) em vez do menu")
+    parser.add_argument('--instrumentar', nargs='?', const='', metavar='ARQUIVO',
+                        help="mede as operações e grava a sessão em telemetry/ "
+                             "(e os histogramas em ARQUIVO: .json ou .prom)")
+    parser.add_argument('--profile', nargs='?', const='', metavar='ARQUIVO',
+                        help="roda sob cProfile e grava as pilhas dobradas para flamegraph em ARQUIVO")
+    args = parser.parse_args()
+    if args.instrumentar is not None:
+        ativar_instrumentacao(args.instrumentar or None)
+
+    def despachar():
+        if args.servidor:
+            iniciar_servidor(args.servidor)
+        elif args.importar_alunos:
+            importar_alunos(args.importar_alunos)
+        elif args.listar_backups:
+            for backup_id in listar_backups():
+                arquivos = carregar_manifesto(backup_id)['arquivos']
+                print(f"{backup_id}  {sum(a['tamanho'] for a in arquivos.values()) / 1024:.1f} KB  {', '.join(arquivos)}")
+        elif args.restaurar_backup is not None:
+            restaurar_backup(args.restaurar_backup or None)
+        elif args.converter:
+            converter_armazenamento(*args.converter)
+        elif args.rotacionar_chave:
+            rotacionar_chave(recriptografar=False)  # recriptografa aqui mesmo, sem o job em segundo plano
+            print(f"Chave rotacionada; {recriptografar_dados()} registros recriptografados.")
+        elif args.exportar_desempenho:
+            exportar_desempenho(args.exportar_desempenho)
+        else:
+            main()
+
+    if args.profile is not None:
+        executar_com_perfil(despachar, args.profile or None)
+    else:
+        despachar()
@@ -0,0 +1,143 @@
+# Teste de carga da API HTTP do PIM.py (python PIM.py --servidor)
+# Sobe o servidor numa cópia temporária dos dados (ou usa --url), cria usuários
+# e, para cada nível de concorrência, mede latência p50/p99 e vazão de um ciclo
+# de aluno: ler um curso e enviar o quiz. Com --login, mede também o login.
+#
+# Uso: python benchmarks/carga.py [--concorrencias 1,4,16,64] [--requisicoes N] [--login]
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Cliente:
+    # Conexão HTTP/1.1 persistente, mínima, só com asyncio
+    def __init__(self, host, porta):
+        self.host, self.porta = host, porta
+        self.leitor = self.escritor = None
+
+    async def pedir(self, metodo, caminho, corpo=None, token=None):
+        if self.escritor is None:
+            self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+        conteudo = json.dumps(corpo).encode() if corpo is not None else b''
+        cabecalhos = f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(conteudo)}\r\n"
+        if token:
+            cabecalhos += f"Authorization: Bearer {token}\r\n"
+        self.escritor.write(cabecalhos.encode() + b"\r\n" + conteudo)
+        await self.escritor.drain()
+        status = int((await self.leitor.readline()).split()[1])
+        tamanho = 0
+        while (linha := await self.leitor.readline()) not in (b'\r\n', b''):
+            nome, _, valor = linha.decode().partition(':')
+            if nome.lower() == 'content-length':
+                tamanho = int(valor)
+        return status, json.loads(await self.leitor.readexactly(tamanho))
+
+    def fechar(self):
+        if self.escritor:
+            self.escritor.close()
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+async def cliente_virtual(host, porta, usuario, requisicoes, medir_login, latencias, largada, prontos):
+    cliente = Cliente(host, porta)
+    try:
+        inicio = time.perf_counter()
+        _, resposta = await cliente.pedir('POST', '/login', {'usuario': usuario, 'senha': 'senha'})
+        if medir_login:
+            latencias.append(time.perf_counter() - inicio)
+        token = resposta['token']
+        prontos.append(usuario)
+        await largada.wait()
+        for i in range(requisicoes):
+            quiz = ('logica', 'python', 'seguranca')[i % 3]
+            inicio = time.perf_counter()
+            await cliente.pedir('GET', f'/cursos/{quiz}')
+            latencias.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            await cliente.pedir('POST', f'/quiz/{quiz}', {'respostas': ['b', 'a', 'b']}, token)
+            latencias.append(time.perf_counter() - inicio)
+        await cliente.pedir('POST', '/logout', token=token)
+    finally:
+        cliente.fechar()
+
+async def rodar(host, porta, concorrencias, requisicoes, medir_login):
+    maior = max(concorrencias)
+    preparador = Cliente(host, porta)
+    for i in range(maior):
+        await preparador.pedir('POST', '/registrar', {'usuario': f'carga{i}', 'senha': 'senha', 'idade': 20})
+    preparador.fechar()
+
+    print(f"{'concorrência':>12}{'requisições':>13}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    resultados = []
+    for concorrencia in concorrencias:
+        latencias, largada, prontos = [], asyncio.Event(), []
+        clientes = asyncio.gather(*(cliente_virtual(host, porta, f'carga{i}', requisicoes, medir_login,
+                                                    latencias, largada, prontos)
+                                    for i in range(concorrencia)))
+        # Os logins (scrypt) ficam fora da vazão: todos entram antes da largada
+        while len(prontos) < concorrencia:
+            await asyncio.sleep(0.01)
+        logins = len(latencias)
+        inicio = time.perf_counter()
+        largada.set()
+        await clientes
+        decorrido = time.perf_counter() - inicio
+        resultado = {'concorrencia': concorrencia, 'requisicoes': len(latencias),
+                     'req_s': (len(latencias) - logins) / decorrido,
+                     'p50_ms': percentil(latencias, 50) * 1000, 'p99_ms': percentil(latencias, 99) * 1000}
+        resultados.append(resultado)
+        print(f"{concorrencia:>12}{resultado['requisicoes']:>13}{resultado['req_s']:>10.1f}"
+              f"{resultado['p50_ms']:>10.1f}{resultado['p99_ms']:>10.1f}")
+    return resultados
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API HTTP do PIM.py")
+    parser.add_argument('--url', help="servidor já rodando (ex.: 127.0.0.1:8080)")
+    parser.add_argument('--concorrencias', default='1,4,16,64')
+    parser.add_argument('--requisicoes', type=int, default=20, help="ciclos curso+quiz por cliente")
+    parser.add_argument('--login', action='store_true', help="inclui a latência do login na medição")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava o resultado em JSON")
+    args = parser.parse_args()
+    concorrencias = [int(c) for c in args.concorrencias.split(',')]
+
+    servidor, pasta = None, None
+    if args.url:
+        host, porta = args.url.split(':')
+        porta = int(porta)
+    else:
+        pasta = tempfile.mkdtemp()
+        for nome in ('PIM.py', 'perguntas.json'):
+            shutil.copy(os.path.join(RAIZ, nome), pasta)
+        host, porta = '127.0.0.1', porta_livre()
+        servidor = subprocess.Popen([sys.executable, 'PIM.py', '--servidor', str(porta)], cwd=pasta,
+                                    stdout=subprocess.PIPE, env={**os.environ, 'PIM_GRAFICOS': 'arquivo'})
+        servidor.stdout.readline()  # espera o "Servidor PIM em ..."
+    try:
+        resultados = asyncio.run(rodar(host, porta, concorrencias, args.requisicoes, args.login))
+    finally:
+        if servidor:
+            servidor.terminate()
+            servidor.wait()
+            shutil.rmtree(pasta, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(resultados, file, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Teste de estresse de sessões concorrentes no PIM.py
+# Sobe N processos que fazem logins, quizzes e logouts ao mesmo tempo sobre a
+# mesma pasta de dados e, no fim, confere se algum contador se perdeu.
+#
+# Uso: python benchmarks/concorrencia.py [--processos N] [--sessoes S] [--armazenamento json|sqlite]
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CURSOS = ("Lógica Computacional", "Python", "Segurança Digital")
+
+def importar_pim(pasta, armazenamento):
+    os.environ['PIM_ARMAZENAMENTO'] = armazenamento
+    sys.path.insert(0, pasta)
+    import PIM
+    return PIM
+
+def sessoes(pasta, armazenamento, usuarios, quantidade, inicio):
+    PIM = importar_pim(pasta, armazenamento)
+    inicio.wait()
+    for i in range(quantidade):
+        usuario = usuarios[i % len(usuarios)]
+        if not PIM.verificar_login(usuario, 'senha'):
+            raise RuntimeError(f"login falhou para {usuario}")
+        PIM.incrementar_acessos(usuario)
+        PIM.obter_tipo_usuario(usuario)
+        PIM.salvar_desempenho(usuario, CURSOS[i % len(CURSOS)], i % 4, 3)
+        PIM.atualizar_tempo_uso(usuario, 1)
+        PIM.descarregar_desempenho()
+
+def main():
+    parser = argparse.ArgumentParser(description="Estresse de sessões concorrentes do PIM.py")
+    parser.add_argument('--processos', type=int, default=8)
+    parser.add_argument('--sessoes', type=int, default=50, help="sessões por processo")
+    parser.add_argument('--usuarios', type=int, default=4, help="usuários disputados pelos processos")
+    parser.add_argument('--armazenamento', choices=('json', 'sqlite'), default='json')
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        shutil.copy(os.path.join(RAIZ, 'PIM.py'), pasta)
+        PIM = importar_pim(pasta, args.armazenamento)
+        usuarios = [f"estresse{i}" for i in range(args.usuarios)]
+        for usuario in usuarios:
+            PIM.registrar_usuario_com_dados(usuario, 'senha', usuario, 20)
+
+        inicio = contexto.Event()
+        processos = [contexto.Process(target=sessoes, args=(pasta, args.armazenamento, usuarios,
+                                                             args.sessoes, inicio))
+                     for _ in range(args.processos)]
+        for processo in processos:
+            processo.start()
+        time.sleep(1)  # deixa todos importarem o PIM antes de largar
+        comeco = time.perf_counter()
+        inicio.set()
+        for processo in processos:
+            processo.join()
+        decorrido = time.perf_counter() - comeco
+
+        total = args.processos * args.sessoes
+        esperado = {u: 0 for u in usuarios}
+        for i in range(args.sessoes):
+            esperado[usuarios[i % len(usuarios)]] += args.processos
+        dados = PIM.carregar_dados()
+        perdidos = 0
+        mapa = PIM.mapear_indices(dados)
+        for usuario in usuarios:
+            registro = dados[mapa[PIM.indice_cego(usuario)]]
+            perdidos += esperado[usuario] - registro['acessos']
+            perdidos += esperado[usuario] - round(registro['tempo_uso'])
+        quizzes = sum(1 for _ in PIM.armazenamento().iterar_desempenho())
+        agregado = sum(a['quantidade'] for a in PIM.agregados_desempenho().values())
+        perdidos += (total - quizzes) + (total - agregado)
+        falhas = sum(1 for processo in processos if processo.exitcode != 0)
+
+    print(f"Armazenamento: {args.armazenamento}, processos: {args.processos}, sessões: {total}")
+    print(f"Tempo: {decorrido:.2f} s, vazão: {total / decorrido:.1f} sessões/s")
+    print(f"Processos com erro: {falhas}, atualizações perdidas: {perdidos}")
+    sys.exit(1 if falhas or perdidos else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Gerador de dados sintéticos para os benchmarks do PIM.py
+# Cria numa pasta uma cópia do PIM.py com chaves, usuários (nomes
+# criptografados, idades, acessos, tempo de uso), histórico de quizzes e o
+# banco de perguntas, tudo a partir de uma semente: a mesma semente gera os
+# mesmos arquivos, menos o sal do hash de senha. Todos os usuários têm a senha
+# SENHA, com um único hash (um scrypt por usuário levaria horas com 1M).
+#
+# Uso: python benchmarks/gerador.py PASTA [--usuarios N] [--semente S] [--armazenamento json|sqlite]
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import random
+import shutil
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SENHA = 'senha'
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João',
+         'Karina', 'Lucas', 'Marina', 'Nicolas', 'Olivia', 'Pedro', 'Rafaela', 'Samuel', 'Tatiane', 'Vitor')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida', 'Rocha')
+INICIO_HISTORICO = 1_700_000_000  # data do primeiro quiz sintético (epoch)
+
+def importar_pim(pasta, nome='PIM'):
+    # Carrega o PIM.py da pasta: BASE_DIR aponta para ela, não para o repositório
+    especificacao = importlib.util.spec_from_file_location(nome, os.path.join(pasta, 'PIM.py'))
+    modulo = importlib.util.module_from_spec(especificacao)
+    sys.modules[nome] = modulo
+    especificacao.loader.exec_module(modulo)
+    return modulo
+
+def nome_usuario(i):
+    return f"usuario{i:07d}"
+
+def criptografar_deterministico(cifra, texto, gerador, instante):
+    # Fernet sorteia o IV; aqui ele vem do gerador para o arquivo ser reproduzível
+    iv = gerador.randbytes(16)
+    if hasattr(cifra, '_encrypt_from_parts'):
+        return cifra._encrypt_from_parts(texto.encode(), instante, iv).decode()
+    return cifra.encrypt(texto.encode()).decode()
+
+def gerar(pasta, usuarios, semente=42, armazenamento='json', quizzes_por_usuario=2, parametros_hash=None):
+    inicio = time.perf_counter()
+    os.makedirs(pasta, exist_ok=True)
+    for nome in ('PIM.py', 'perguntas.json'):
+        shutil.copy(os.path.join(RAIZ, nome), pasta)
+    gerador = random.Random(semente)
+    with open(os.path.join(pasta, 'chave.key'), 'wb') as file:
+        file.write(base64.urlsafe_b64encode(gerador.randbytes(32)))
+    with open(os.path.join(pasta, 'indice.key'), 'wb') as file:
+        file.write(gerador.randbytes(32))
+
+    PIM = importar_pim(pasta, f'PIM_gerador_{os.getpid()}')
+    if parametros_hash:
+        with open(PIM.HASH_PARAMS_FILE, 'w') as file:
+            json.dump(parametros_hash, file)
+    senha_hash = PIM.hash_senha(SENHA)
+    cifra = PIM.fernet.Fernet(PIM.carregar_chave())
+    instante = INICIO_HISTORICO
+
+    dados, senhas = [], {}
+    for i in range(usuarios):
+        usuario = nome_usuario(i)
+        senhas[usuario] = senha_hash
+        dados.append({
+            'nome': criptografar_deterministico(cifra, f"{gerador.choice(NOMES)} {gerador.choice(SOBRENOMES)}",
+                                                gerador, instante),
+            'indice': PIM.indice_cego(usuario),
+            'idade': gerador.randint(16, 70),
+            'acessos': int(gerador.expovariate(1 / 20)),
+            'tempo_uso': round(gerador.expovariate(1 / 2), 6),
+            'tipo': 'admin' if i == 0 or gerador.random() < 0.01 else 'aluno',
+        })
+    with open(PIM.USERS_FILE, 'w') as file:
+        json.dump(senhas, file)
+    with open(PIM.DATA_FILE, 'w') as file:
+        json.dump(dados, file)
+
+    cursos = [quiz.curso for quiz in PIM.banco_perguntas().values()]
+    with open(PIM.DESEMPENHO_LOG_FILE, 'w') as file:
+        for _ in range(usuarios * quizzes_por_usuario):
+            instante += gerador.randint(1, 120)
+            file.write(json.dumps({
+                'usuario': nome_usuario(gerador.randrange(usuarios)),
+                'curso': gerador.choice(cursos),
+                'acertos': gerador.randint(0, 3),
+                'total': 3,
+                'data': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(instante)),
+            }) + '\n')
+
+    if armazenamento != 'json':
+        PIM.converter_armazenamento('json', armazenamento)
+    return time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o PIM.py")
+    parser.add_argument('pasta')
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--quizzes-por-usuario', type=int, default=2)
+    parser.add_argument('--armazenamento', choices=('json', 'sqlite'), default='json')
+    args = parser.parse_args()
+    decorrido = gerar(args.pasta, args.usuarios, args.semente, args.armazenamento, args.quizzes_por_usuario)
+    print(f"{args.usuarios} usuários gerados em {args.pasta} ({decorrido:.1f} s)")
+
+if __name__ == '__main__':
+    main()
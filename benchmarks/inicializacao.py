@@ -0,0 +1,88 @@
+# Benchmark de inicialização do PIM.py
+# Mede o custo de importar o módulo (relatório no estilo "python -X importtime")
+# e o tempo de parede até o primeiro prompt do menu de login aparecer.
+#
+# Uso: python benchmarks/inicializacao.py [--repeticoes N] [--limite MS] [--json ARQUIVO]
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVOS = ('PIM.py', 'perguntas.json', 'chave.key', 'indice.key', 'dados.json', 'usuarios.json',
+            'desempenho.json')
+PROMPT = "Escolha uma opção: "
+
+def copiar_projeto(destino):
+    # O PIM grava arquivos na própria pasta; o benchmark roda numa cópia
+    for nome in ARQUIVOS:
+        origem = os.path.join(RAIZ, nome)
+        if os.path.exists(origem):
+            shutil.copy(origem, destino)
+
+def tempos_de_import(pasta):
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import PIM'],
+                               cwd=pasta, capture_output=True, text=True, check=True)
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        modulos.append((nome.strip(), int(proprio), int(acumulado)))
+    return modulos
+
+def tempo_ate_prompt(pasta):
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, 'PIM.py'], cwd=pasta, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, env={**os.environ, 'PYTHONIOENCODING': 'utf-8'})
+    saida = b''
+    while PROMPT.encode() not in saida:
+        pedaco = processo.stdout.read1(4096)
+        if not pedaco:
+            raise RuntimeError("PIM.py terminou antes de mostrar o menu")
+        saida += pedaco
+    decorrido = time.perf_counter() - inicio
+    processo.communicate(b'3\n')
+    return decorrido
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização do PIM.py")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="quantos imports mostrar")
+    parser.add_argument('--limite', type=float, help="falha (código 1) se a mediana até o prompt passar de MS")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        copiar_projeto(pasta)
+        tempo_ate_prompt(pasta)  # aquecimento: gera __pycache__ e arquivos iniciais
+        modulos = tempos_de_import(pasta)
+        prompts = [tempo_ate_prompt(pasta) * 1000 for _ in range(args.repeticoes)]
+
+    pim = next((m for m in modulos if m[0] == 'PIM'), None)
+    print(f"{'módulo':<40}{'próprio (ms)':>14}{'acumulado (ms)':>16}")
+    for nome, proprio, acumulado in sorted(modulos, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{nome:<40}{proprio / 1000:>14.2f}{acumulado / 1000:>16.2f}")
+    mediana = statistics.median(prompts)
+    print(f"\nImport do PIM: {pim[2] / 1000:.2f} ms" if pim else "\nImport do PIM não encontrado")
+    print(f"Até o primeiro prompt: mediana {mediana:.1f} ms, mín {min(prompts):.1f} ms, máx {max(prompts):.1f} ms")
+    pesados = [m[0] for m in modulos if m[0].split('.')[0] in ('matplotlib', 'numpy', 'cryptography')]
+    if pesados:
+        print(f"Atenção: importados na inicialização: {', '.join(sorted(set(pesados)))}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'import_pim_ms': pim[2] / 1000 if pim else None, 'prompt_ms': prompts,
+                       'modulos': modulos, 'pesados': pesados}, file, indent=4)
+    if args.limite is not None and mediana > args.limite:
+        print(f"Regressão: mediana {mediana:.1f} ms acima do limite de {args.limite:.1f} ms")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Benchmark da correção de quizzes do PIM.py, sem passar pelo menu
+# Gera tentativas sintéticas (com semente fixa) para um curso do banco de
+# perguntas e mede a vazão da correção uma a uma e da correção em lote (numpy).
+#
+# Uso: python benchmarks/quizzes.py [--curso ID] [--tentativas N] [--sortear K] [--banco ARQUIVO]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PIM
+
+def gerar_tentativas(quiz, quantidade, sortear, semente):
+    gerador = random.Random(semente)
+    letras = [chr(97 + i) for i in range(max(len(p.opcoes) for p in quiz.perguntas))]
+    indices = sorted(gerador.sample(range(len(quiz.perguntas)), sortear))
+    tentativas = [''.join(gerador.choice(letras) for _ in indices) for _ in range(quantidade)]
+    return indices, tentativas
+
+def medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da correção de quizzes")
+    parser.add_argument('--banco', help="banco de perguntas (padrão: perguntas.json do PIM)")
+    parser.add_argument('--curso', help="id do curso (padrão: o primeiro do banco)")
+    parser.add_argument('--tentativas', type=int, default=100_000)
+    parser.add_argument('--sortear', type=int, help="perguntas por tentativa (padrão: todas)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    caminho = args.banco or PIM.PERGUNTAS_FILE
+    carga, banco = medir(lambda: PIM.ler_banco(caminho))
+    PIM._banco = banco
+    quiz = banco[args.curso] if args.curso else next(iter(banco.values()))
+    sortear = min(args.sortear or len(quiz.perguntas), len(quiz.perguntas))
+    indices, tentativas = gerar_tentativas(quiz, args.tentativas, sortear, args.semente)
+
+    uma_a_uma, esperado = medir(lambda: [PIM.corrigir_quiz(quiz.id, t, indices) for t in tentativas])
+    PIM.corrigir_lote(quiz.id, tentativas[:1], indices)  # aquecimento: importa o numpy
+    em_lote, acertos = medir(lambda: PIM.corrigir_lote(quiz.id, tentativas, indices))
+    if acertos.tolist() != esperado:
+        raise SystemExit("Correção em lote diverge da correção uma a uma")
+
+    resultado = {'curso': quiz.id, 'perguntas': sortear, 'tentativas': args.tentativas,
+                 'carga_banco_ms': carga * 1000,
+                 'uma_a_uma_por_s': args.tentativas / uma_a_uma, 'lote_por_s': args.tentativas / em_lote}
+    print(f"Banco carregado em {resultado['carga_banco_ms']:.2f} ms; curso '{quiz.id}', "
+          f"{sortear} perguntas, {args.tentativas} tentativas")
+    print(f"{'modo':<14}{'tempo (ms)':>12}{'tentativas/s':>16}")
+    print(f"{'uma a uma':<14}{uma_a_uma * 1000:>12.1f}{resultado['uma_a_uma_por_s']:>16.0f}")
+    print(f"{'em lote':<14}{em_lote * 1000:>12.1f}{resultado['lote_por_s']:>16.0f}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(resultado, file, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Benchmark do hash de senha do PIM.py
+# Para cada custo (n do scrypt ou iterações do PBKDF2) mede a latência de uma
+# verificação de login e a vazão em logins/s por núcleo e com todos os núcleos.
+#
+# Uso: python benchmarks/senhas.py [--algoritmo scrypt|pbkdf2_sha256] [--verificacoes N] [--logins-alvo L]
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PIM
+
+CUSTOS = {
+    'scrypt': [{'algoritmo': 'scrypt', 'n': 2 ** e, 'r': 8, 'p': 1} for e in range(12, 18)],
+    'pbkdf2_sha256': [{'algoritmo': 'pbkdf2_sha256', 'iteracoes': i}
+                      for i in (100_000, 200_000, 400_000, 600_000, 1_000_000)],
+}
+
+def verificar(senha_hash, quantidade):
+    for _ in range(quantidade):
+        PIM.conferir_senha('senha-de-teste', senha_hash)
+    return quantidade
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão de login por custo de hash")
+    parser.add_argument('--algoritmo', choices=list(CUSTOS), default='scrypt')
+    parser.add_argument('--verificacoes', type=int, default=20, help="verificações por medição")
+    parser.add_argument('--nucleos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--logins-alvo', type=float, help="logins/s desejados, para estimar núcleos")
+    args = parser.parse_args()
+
+    print(f"Custo calibrado nesta máquina: {PIM.calibrar_custo()}")
+    print(f"{'custo':<12}{'latência (ms)':>15}{'logins/s/núcleo':>18}{f'logins/s ({args.nucleos} núcleos)':>26}"
+          + (f"{'núcleos p/ alvo':>18}" if args.logins_alvo else ''))
+    with ProcessPoolExecutor(max_workers=args.nucleos) as pool:
+        for parametros in CUSTOS[args.algoritmo]:
+            senha_hash = PIM.hash_senha('senha-de-teste', parametros)
+            inicio = time.perf_counter()
+            verificar(senha_hash, args.verificacoes)
+            latencia = (time.perf_counter() - inicio) / args.verificacoes
+            inicio = time.perf_counter()
+            total = sum(pool.map(verificar, [senha_hash] * args.nucleos, [args.verificacoes] * args.nucleos))
+            vazao = total / (time.perf_counter() - inicio)
+            custo = parametros.get('n', parametros.get('iteracoes'))
+            linha = f"{custo:<12}{latencia * 1000:>15.1f}{vazao / args.nucleos:>18.1f}{vazao:>26.1f}"
+            if args.logins_alvo:
+                linha += f"{args.logins_alvo / (vazao / args.nucleos):>18.1f}"
+            print(linha)
+
+if __name__ == '__main__':
+    main()
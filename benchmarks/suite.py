@@ -0,0 +1,211 @@
+# Suíte de benchmarks do PIM.py com dados sintéticos
+# Para cada tamanho (usuários), gera os dados com benchmarks/gerador.py e roda
+# cada cenário num processo separado, sobre uma cópia limpa dos dados. Mede
+# vazão, latência (p50/p90/p99/máx) e pico de memória (RSS) e grava tudo em
+# JSON, junto com o commit, para comparar execuções.
+#
+# Uso: python benchmarks/suite.py [--tamanhos 1000,100000,1000000] [--cenarios login,stats,...]
+#                                 [--iteracoes N] [--tempo-maximo S] [--saida ARQUIVO] [--comparar ARQUIVO]
+# Para um hash de senha no custo mínimo (rodadas rápidas), use PIM_HASH_ALVO_MS=1.
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import gerador
+
+RAIZ = gerador.RAIZ
+CENARIOS = ('login', 'logout', 'sessao', 'registro', 'exclusao', 'estatisticas', 'graficos', 'consulta', 'backup')
+
+def cenario(PIM, nome, usuarios, aleatorio):
+    # Devolve (preparo, acao): 'preparo' roda fora da medição, antes de cada 'acao'
+    def sortear_usuario():
+        return gerador.nome_usuario(aleatorio.randrange(usuarios))
+
+    if nome == 'login':
+        def acao(i):
+            usuario = sortear_usuario()
+            if not PIM.verificar_login(usuario, gerador.SENHA):
+                raise RuntimeError(f"login falhou para {usuario}")
+            PIM.incrementar_acessos(usuario)
+            PIM.obter_tipo_usuario(usuario)
+        return None, acao
+    if nome == 'logout':
+        def acao(i):
+            PIM.atualizar_tempo_uso(sortear_usuario(), aleatorio.random())
+            PIM.descarregar_desempenho()
+        return None, acao
+    if nome == 'sessao':
+        # Ciclo completo do menu: login, dois quizzes e logout numa unidade de trabalho
+        def acao(i):
+            sessao = PIM.abrir_sessao(sortear_usuario(), gerador.SENHA, intervalo=0)
+            for _ in range(2):
+                PIM.salvar_desempenho(sessao.usuario, 'Python', aleatorio.randint(0, 3), 3)
+            sessao.encerrar()
+        return None, acao
+    if nome == 'registro':
+        return None, lambda i: PIM.registrar_usuario_com_dados(f"novo{i:07d}", gerador.SENHA, "Novo Usuário", 20)
+    if nome == 'exclusao':
+        return None, lambda i: PIM.excluir_usuario(gerador.nome_usuario(i % usuarios))
+    if nome == 'estatisticas':
+        return None, lambda i: PIM.resumo_estatisticas(PIM.carregar_tabela(textos=False), PIM.agregados_desempenho())
+    if nome == 'graficos':
+        return None, lambda i: PIM.graficos_administrador(PIM.carregar_tabela(textos=False), PIM.agregados_desempenho())
+    if nome == 'consulta':
+        # Primeira página da listagem do administrador, ordenada por acessos
+        return None, lambda i: PIM.consultar_usuarios(ordenar='acessos', decrescente=True)
+    if nome == 'backup':
+        # Entre um backup e outro há atividade, senão todo backup seria vazio
+        return (lambda i: PIM.incrementar_acessos(sortear_usuario())), lambda i: PIM.criar_backup()
+    raise ValueError(f"cenário desconhecido: {nome}")
+
+def pico_rss_mb():
+    # VmHWM é do próprio processo; o ru_maxrss do Linux herda o pico do pai no fork
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as file:
+            for linha in file:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / 1024 if sys.platform == 'darwin' else pico / 1024
+
+def executar_cenario(args):
+    # Processo filho: importa o PIM da pasta de dados e mede um cenário só
+    os.environ['PIM_ARMAZENAMENTO'] = args.armazenamento
+    PIM = gerador.importar_pim(args.pasta)
+    preparo, acao = cenario(PIM, args.cenario, args.usuarios, random.Random(args.semente))
+    latencias = []
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        for i in range(args.aquecimento + args.iteracoes):
+            if preparo:
+                preparo(i)
+            inicio = time.perf_counter()
+            acao(i)
+            decorrido = time.perf_counter() - inicio
+            if i >= args.aquecimento:
+                latencias.append(decorrido)
+                if sum(latencias) > args.tempo_maximo and len(latencias) >= 3:
+                    break
+        PIM.descarregar_desempenho()
+    with open(args.resultado, 'w') as file:
+        json.dump({'latencias': latencias, 'rss_pico_mb': pico_rss_mb()}, file)
+
+def percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+def resumir(tamanho, nome, medicao, geracao):
+    latencias = sorted(medicao['latencias'])
+    return {'usuarios': tamanho, 'cenario': nome, 'iteracoes': len(latencias),
+            'vazao_op_s': len(latencias) / sum(latencias) if sum(latencias) else None,
+            'p50_ms': percentil(latencias, 50) * 1000, 'p90_ms': percentil(latencias, 90) * 1000,
+            'p99_ms': percentil(latencias, 99) * 1000, 'max_ms': latencias[-1] * 1000,
+            'rss_pico_mb': medicao['rss_pico_mb'], 'geracao_s': geracao}
+
+def commit_atual():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip()
+        return commit + ('-modificado' if sujo else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+def comparar(resultados, caminho):
+    with open(caminho) as file:
+        anterior = json.load(file)
+    base = {(r['usuarios'], r['cenario']): r for r in anterior['resultados']}
+    print(f"\nComparação com {anterior['commit']} ({caminho}): razão atual/anterior")
+    print(f"{'usuários':>10} {'cenário':<14}{'vazão':>10}{'p50':>10}{'p99':>10}{'RSS':>10}")
+    for r in resultados:
+        a = base.get((r['usuarios'], r['cenario']))
+        if not a:
+            continue
+        razoes = [r[c] / a[c] if r[c] and a[c] else float('nan')
+                  for c in ('vazao_op_s', 'p50_ms', 'p99_ms', 'rss_pico_mb')]
+        print(f"{r['usuarios']:>10} {r['cenario']:<14}" + ''.join(f"{x:>10.2f}" for x in razoes))
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do PIM.py com dados sintéticos")
+    parser.add_argument('--tamanhos', default='1000,100000,1000000', help="quantidades de usuários")
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--iteracoes', type=int, default=20, help="medições por cenário")
+    parser.add_argument('--aquecimento', type=int, default=1, help="execuções descartadas antes de medir")
+    parser.add_argument('--tempo-maximo', type=float, default=60, help="segundos medidos por cenário, no máximo")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--armazenamento', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--saida', help="JSON do resultado (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--comparar', metavar='ARQUIVO', help="resultado anterior para comparar")
+    # Modo interno: um cenário num processo filho
+    parser.add_argument('--cenario', help=argparse.SUPPRESS)
+    parser.add_argument('--pasta', help=argparse.SUPPRESS)
+    parser.add_argument('--usuarios', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--resultado', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.cenario:
+        executar_cenario(args)
+        return
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    cenarios = args.cenarios.split(',')
+    for nome in cenarios:
+        if nome not in CENARIOS:
+            parser.error(f"cenário desconhecido: {nome} (opções: {', '.join(CENARIOS)})")
+    commit = commit_atual()
+    # O custo do hash é calibrado uma vez e vale para todos os tamanhos
+    parametros_hash = gerador.importar_pim(RAIZ).calibrar_custo()
+    resultados = []
+    print(f"{'usuários':>10} {'cenário':<14}{'iter.':>7}{'op/s':>10}{'p50 (ms)':>10}{'p90 (ms)':>10}"
+          f"{'p99 (ms)':>10}{'RSS (MB)':>10}")
+    with tempfile.TemporaryDirectory() as temporaria:
+        for tamanho in tamanhos:
+            base = os.path.join(temporaria, f'base{tamanho}')
+            with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+                geracao = gerador.gerar(base, tamanho, args.semente, args.armazenamento,
+                                        parametros_hash=parametros_hash)
+            for nome in cenarios:
+                pasta = os.path.join(temporaria, 'execucao')
+                shutil.copytree(base, pasta)
+                arquivo = os.path.join(temporaria, 'resultado.json')
+                subprocess.run([sys.executable, os.path.abspath(__file__), '--cenario', nome, '--pasta', pasta,
+                                '--usuarios', str(tamanho), '--resultado', arquivo,
+                                '--iteracoes', str(args.iteracoes), '--aquecimento', str(args.aquecimento),
+                                '--tempo-maximo', str(args.tempo_maximo), '--semente', str(args.semente),
+                                '--armazenamento', args.armazenamento], check=True)
+                with open(arquivo) as file:
+                    r = resumir(tamanho, nome, json.load(file), geracao)
+                resultados.append(r)
+                shutil.rmtree(pasta)
+                print(f"{tamanho:>10} {nome:<14}{r['iteracoes']:>7}{r['vazao_op_s']:>10.1f}{r['p50_ms']:>10.1f}"
+                      f"{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['rss_pico_mb'] or 0:>10.1f}")
+            shutil.rmtree(base)
+
+    saida = args.saida or os.path.join(RAIZ, 'benchmarks', 'resultados', f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as file:
+        json.dump({'commit': commit, 'data': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                   'plataforma': platform.platform(), 'cpus': os.cpu_count(), 'semente': args.semente,
+                   'armazenamento': args.armazenamento, 'parametros_hash': parametros_hash,
+                   'resultados': resultados}, file, indent=4)
+    print(f"\nResultado gravado em {saida}")
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Benchmark da tabela de usuários em colunas do PIM.py
+# Compara a lista de dicionários de carregar_dados() com a TabelaUsuarios de
+# carregar_tabela(): memória retida por usuário e tempo de carga, estatísticas
+# e montagem dos gráficos do administrador, sobre dados sintéticos.
+#
+# Uso: python benchmarks/tabela.py [--usuarios 100000] [--armazenamento json|sqlite] [--json ARQUIVO]
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import gerador
+
+def memoria_retida(funcao):
+    # Bytes alocados que continuam vivos depois da chamada (o resultado)
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    resultado = funcao()
+    gc.collect()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, depois - antes
+
+def cronometrar(funcao, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista de dicionários x tabela em colunas")
+    parser.add_argument('--usuarios', type=int, default=100_000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--armazenamento', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        gerador.gerar(pasta, args.usuarios, args.semente, args.armazenamento)
+        os.environ['PIM_ARMAZENAMENTO'] = args.armazenamento
+        PIM = gerador.importar_pim(pasta)
+        agregados = PIM.agregados_desempenho()
+        PIM.np.zeros(1)  # importa o numpy fora das medições
+
+        dados, memoria_dados = memoria_retida(PIM.carregar_dados)
+        tabela, memoria_tabela = memoria_retida(PIM.carregar_tabela)
+        numerica, memoria_numerica = memoria_retida(lambda: PIM.carregar_tabela(textos=False))
+        memoria = (memoria_dados, memoria_tabela, memoria_numerica)
+        tempos = {
+            'carga': [cronometrar(PIM.carregar_dados), cronometrar(PIM.carregar_tabela),
+                      cronometrar(lambda: PIM.carregar_tabela(textos=False))],
+            'estatisticas': [cronometrar(lambda: PIM.resumo_estatisticas(d, agregados))
+                             for d in (dados, tabela, numerica)],
+            'graficos': [cronometrar(lambda: PIM.graficos_administrador(d, agregados))
+                         for d in (dados, tabela, numerica)],
+        }
+
+    formas = ('dicionarios', 'colunas', 'colunas_sem_textos')
+    print(f"{args.usuarios} usuários ({args.armazenamento}); razão = dicionários / colunas sem textos")
+    print(f"{'':<22}{'dicionários':>14}{'colunas':>14}{'sem textos':>14}{'razão':>10}")
+    print(f"{'memória/usuário (B)':<22}" + ''.join(f"{m / args.usuarios:>14.0f}" for m in memoria)
+          + f"{memoria[0] / memoria[2]:>10.1f}")
+    for nome, valores in tempos.items():
+        print(f"{nome + ' (ms)':<22}" + ''.join(f"{v * 1000:>14.1f}" for v in valores)
+              + f"{valores[0] / valores[2]:>10.1f}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'usuarios': args.usuarios, 'armazenamento': args.armazenamento,
+                       'memoria_por_usuario': {f: m / args.usuarios for f, m in zip(formas, memoria)},
+                       'tempos_ms': {nome: {f: v * 1000 for f, v in zip(formas, valores)}
+                                     for nome, valores in tempos.items()}}, file, indent=4)
+
+if __name__ == '__main__':
+    main()